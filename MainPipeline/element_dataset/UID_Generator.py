@@ -1,6 +1,6 @@
 # UID_Generator.py
 import hashlib, re
-from typing import Optional
+from typing import List, Optional
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 
@@ -15,26 +15,34 @@ def _normalize_html(raw_html: str) -> str:
     return html
 
 # JS to compute a robust :nth-of-type DOM path (ignores IDs/classes to avoid flakiness).
-_JS_DOM_PATH = """
-return (function(el){
-  if(!el) return "";
-  const parts = [];
-  let cur = el;
-  while (cur && cur.nodeType === 1 && cur.tagName) {
-    let tag = cur.tagName.toLowerCase();
-    let idx = 1;
-    let sib = cur.previousElementSibling;
-    while (sib) {
-      if (sib.tagName === cur.tagName) idx++;
-      sib = sib.previousElementSibling;
+# One round-trip returns [dom_path, outerHTML] for every element passed in.
+_JS_DOM_PATHS_AND_HTML = """
+return (function(els){
+  function domPath(el){
+    if(!el) return "";
+    const parts = [];
+    let cur = el;
+    while (cur && cur.nodeType === 1 && cur.tagName) {
+      let tag = cur.tagName.toLowerCase();
+      let idx = 1;
+      let sib = cur.previousElementSibling;
+      while (sib) {
+        if (sib.tagName === cur.tagName) idx++;
+        sib = sib.previousElementSibling;
+      }
+      parts.push(tag + ":nth-of-type(" + idx + ")");
+      cur = cur.parentElement;
     }
-    parts.push(tag + ":nth-of-type(" + idx + ")");
-    cur = cur.parentElement;
+    return parts.reverse().join(">");
   }
-  return parts.reverse().join(">");
+  return els.map(function(el){ return [domPath(el), (el && el.outerHTML) || ""]; });
 })(arguments[0]);
 """
 
+def _uid(dom_path: str, outer: str) -> str:
+    normalized = _normalize_html(outer)
+    return hashlib.sha1(f"{dom_path}||{normalized}".encode("utf-8")).hexdigest()[:16]
+
 class UIDGenerator:
     """
     Deterministic, Selenium-first stable ID generator.
@@ -42,10 +50,18 @@ class UIDGenerator:
     """
     @staticmethod
     def id_for_element(driver: WebDriver, element: WebElement) -> str:
-        dom_path: str = driver.execute_script(_JS_DOM_PATH, element) or ""
-        outer: str = element.get_attribute("outerHTML") or ""
-        normalized = _normalize_html(outer)
-        return hashlib.sha1(f"{dom_path}||{normalized}".encode("utf-8")).hexdigest()[:16]
+        return UIDGenerator.ids_for_elements(driver, [element])[0]
+
+    @staticmethod
+    def ids_for_elements(driver: WebDriver, elements: List[WebElement]) -> List[str]:
+        """
+        IDs for all elements, computed with a single execute_script call
+        instead of one WebDriver round-trip per element.
+        """
+        if not elements:
+            return []
+        pairs = driver.execute_script(_JS_DOM_PATHS_AND_HTML, elements) or []
+        return [_uid(dom_path or "", outer or "") for dom_path, outer in pairs]
 
     @staticmethod
     def element_type(element: WebElement) -> str:
@@ -1,7 +1,7 @@
 # element_dataset_pipeline.py
 from pathlib import Path
 from typing import Dict, Any
-import json
+import orjson
 
 from initialize_element_dataset import (
     build_initial_dataset,
@@ -18,14 +18,8 @@ def _load_element_dataset(out_json: Path) -> Dict[str, Dict[str, Any]]:
     Load element_dataset.json and return a mapping:
         ID -> element record
     """
-    data = json.loads(out_json.read_text(encoding="utf-8"))
-    elements = data.get("Elements", [])
-    by_id: Dict[str, Dict[str, Any]] = {}
-    for elem in elements:
-        uid = elem.get("ID")
-        if uid:
-            by_id[uid] = elem
-    return by_id
+    data = orjson.loads(out_json.read_bytes())
+    return {e["ID"]: e for e in data.get("Elements", ()) if e.get("ID")}
 
 
 def inspect_elements_with_metadata(html: Path, out_json: Path) -> None:
@@ -44,8 +38,10 @@ def inspect_elements_with_metadata(html: Path, out_json: Path) -> None:
         elems = _collect_elements(driver)
         print(f"Total meaningful elements: {len(elems)}")
 
-        for el in elems:
-            uid = UIDGenerator.id_for_element(driver, el)
+        # One batched JS call for all UIDs instead of per-element round-trips
+        uids = UIDGenerator.ids_for_elements(driver, elems)
+
+        for uid in uids:
             meta = dataset_by_id.get(uid)
 
             if not meta:
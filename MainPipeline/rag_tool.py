@@ -15,14 +15,21 @@ Features:
   controlled by a simple provider flag.
 """
 
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import hashlib
+import threading
+import time
 
 import chromadb
+import numpy as np
 
 from llama_index.core import (
     VectorStoreIndex,
     Document,
-    Settings,
+    QueryBundle,
     StorageContext,
 )
 from llama_index.core.retrievers import VectorIndexRetriever
@@ -32,6 +39,7 @@ from llama_index.core.postprocessor import (
 )
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.embeddings.huggingface.utils import format_query, format_text
 from llama_index.llms.openai import OpenAI
 from llama_index.llms.google_genai import GoogleGenAI  # Gemini via Google GenAI
 
@@ -41,11 +49,61 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# read init_profile.json
+# read init_profile.json / write rag_output.json
 import json
+import orjson
 
 
 LLMProvider = Literal["openai", "gemini"]
+EmbeddingBackend = Literal["huggingface", "optimum"]
+
+# Max number of embeddings kept per ThresholdedRAGReranker (LRU)
+EMBED_CACHE_SIZE = 4096
+
+# Shared stand-in for nodes without metadata; never mutate
+_EMPTY: Dict[str, Any] = {}
+
+# query() result cache: max entries and time-to-live (seconds)
+RESULT_CACHE_SIZE = 8192
+RESULT_CACHE_TTL_S = 3600.0
+
+# HNSW parameters for Chroma collections created by from_chroma. Higher
+# M / ef give better recall at the cost of memory and CPU per query.
+HNSW_M = 32
+HNSW_CONSTRUCTION_EF = 200
+HNSW_MIN_SEARCH_EF = 64
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries expire ttl_sec seconds after being set.
+    Thread-safe: one reranker (see get_chroma_rag) may be shared by threads.
+    """
+
+    def __init__(self, max_items: int = RESULT_CACHE_SIZE, ttl_sec: float = RESULT_CACHE_TTL_S):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stamp, value = item
+            if time.monotonic() - stamp > self.ttl_sec:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
 
 
 def make_llm(provider: LLMProvider, model_name: str):
@@ -65,6 +123,128 @@ def make_llm(provider: LLMProvider, model_name: str):
         raise ValueError(f"Unknown LLM provider: {provider}")
 
 
+def _read_model_file(model_name: str, filename: str) -> Optional[Any]:
+    """
+    JSON file of a local model directory or a Hugging Face Hub model, None if
+    the model has no such file. Download errors (e.g. offline) propagate.
+    """
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        if not os.path.isfile(path):
+            return None
+    else:
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.utils import EntryNotFoundError, LocalEntryNotFoundError
+
+        try:
+            path = hf_hub_download(model_name, filename)
+        except LocalEntryNotFoundError:
+            raise  # offline and not cached: says nothing about the model
+        except EntryNotFoundError:
+            return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sentence_transformers_pooling(model_name: str) -> str:
+    """
+    Pooling mode ("mean" or "cls") of a sentence-transformers model, read from
+    its Pooling module config. Raises ValueError when the model has no such
+    config or pools in a way OptimumEmbedding cannot reproduce (max, ...).
+    """
+    modules = _read_model_file(model_name, "modules.json") or []
+    pooling_dir = next(
+        (m["path"] for m in modules if m.get("type", "").endswith(".Pooling")), None
+    )
+    config = (
+        _read_model_file(model_name, f"{pooling_dir}/config.json")
+        if pooling_dir is not None else None
+    )
+    if config is None:
+        raise ValueError(f"{model_name} is not a sentence-transformers model")
+
+    # sentence-transformers >= 5 writes "pooling_mode": "mean"; older
+    # versions one boolean flag per mode (e.g. all-MiniLM-L6-v2)
+    mode = config.get("pooling_mode")
+    if mode is None:
+        flags = {k for k, v in config.items() if k.startswith("pooling_mode_") and v}
+        mode = {
+            frozenset({"pooling_mode_mean_tokens"}): "mean",
+            frozenset({"pooling_mode_cls_token"}): "cls",
+        }.get(frozenset(flags), ", ".join(sorted(flags)))
+    if mode not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling for the optimum backend: {mode}")
+    return mode
+
+
+def make_embed_model(
+    backend: EmbeddingBackend,
+    model_name: str,
+    onnx_dir: Optional[str] = None,
+    device: Optional[str] = None,
+):
+    """
+    Factory to build the embedding model.
+
+    backend: "huggingface" -> PyTorch HuggingFaceEmbedding (default)
+             "optimum"     -> ONNX Runtime export of the same model
+                              (needs llama-index-embeddings-huggingface-optimum)
+
+    The ONNX export is written to onnx_dir once and reused afterwards.
+    It is not quantized and uses the model's own pooling (mean for
+    all-MiniLM-L6-v2) plus L2 normalization, like HuggingFaceEmbedding, so
+    vectors stay compatible with an index built with the PyTorch model.
+    Models whose pooling cannot be reproduced are rejected (ValueError).
+
+    device: "cuda", "mps", "cpu", ...; None picks the best available.
+    """
+    if backend == "huggingface":
+        return HuggingFaceEmbedding(model_name=model_name, device=device)
+    elif backend == "optimum":
+        from llama_index.embeddings.huggingface_optimum import OptimumEmbedding
+
+        pooling = sentence_transformers_pooling(model_name)
+        folder = onnx_dir or f"./onnx-{model_name.rstrip('/').split('/')[-1]}"
+        if not os.path.isdir(folder):
+            OptimumEmbedding.create_and_save_optimum_model(model_name, folder)
+        return OptimumEmbedding(
+            folder_name=folder, pooling=pooling, normalize=True, device=device
+        )
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def queries_embed_as_texts(embed_model) -> bool:
+    """
+    True when embed_model encodes a query exactly like a document with the
+    same text, so queries may go through get_text_embedding_batch. Compares
+    the prompts actually applied, including per-model defaults (BGE and
+    instructor models get a query instruction even if none is configured).
+    Unknown embedding classes are assumed asymmetric.
+    """
+    if isinstance(embed_model, HuggingFaceEmbedding):
+        # sentence-transformers model; its prompts hold the resolved defaults
+        prompts = getattr(getattr(embed_model, "_model", None), "prompts", None)
+        if not isinstance(prompts, dict):
+            return False
+        return (prompts.get("query") or "") == (prompts.get("text") or "")
+    if type(embed_model).__name__ == "OptimumEmbedding":
+        probe = "query"
+        return format_query(
+            probe, embed_model.model_name, embed_model.query_instruction
+        ) == format_text(probe, embed_model.model_name, embed_model.text_instruction)
+    return False
+
+
+@functools.lru_cache(maxsize=8)
+def _get_chroma_client(persist_dir: str):
+    """
+    One PersistentClient per persist_dir for the whole process, so repeated
+    from_chroma(...) calls share the same SQLite connection and HNSW index.
+    """
+    return chromadb.PersistentClient(path=persist_dir)
+
+
 class ThresholdedRAGReranker:
     """
     RAG helper that can work with:
@@ -79,7 +259,7 @@ class ThresholdedRAGReranker:
             - text
             - score
             - metadata
-            - embedding (list[float])
+            - embedding (np.ndarray, float32)
 
     If no nodes pass the cutoff (or reranker returns nothing), returns [].
     """
@@ -87,11 +267,13 @@ class ThresholdedRAGReranker:
     def __init__(
         self,
         index: VectorStoreIndex,
-        embed_model: HuggingFaceEmbedding,
+        embed_model,  # HuggingFaceEmbedding or OptimumEmbedding
         llm,  # can be OpenAI or GoogleGenAI (or any LlamaIndex LLM)
         similarity_cutoff: float = 0.7,
         retrieve_top_k: int = 20,
         final_top_k: int = 5,
+        collection=None,  # chromadb Collection when built via from_chroma
+        result_cache_ttl_s: float = RESULT_CACHE_TTL_S,  # <= 0 disables
     ):
         self.index = index
         self.embed_model = embed_model
@@ -100,14 +282,29 @@ class ThresholdedRAGReranker:
         self.retrieve_top_k = retrieve_top_k
         self.final_top_k = final_top_k
 
-        # Set global defaults (optional but convenient)
-        Settings.embed_model = embed_model
-        Settings.llm = llm
+        # Used to look up stored embeddings instead of re-embedding results
+        self._collection = collection
+
+        # LRU of computed embeddings keyed by a hash of (kind, text);
+        # guarded by a lock because query_batch may run queries in threads
+        self._embed_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._embed_cache_lock = threading.Lock()
+
+        # Whether query embeddings can be computed in one document-style batch
+        self._batch_queries = queries_embed_as_texts(embed_model)
 
-        # Retriever: dense similarity search (cosine under the hood)
+        # Recent query results, so repeated queries skip retrieval + LLM rerank
+        self._result_cache: Optional[TTLCache] = (
+            TTLCache(ttl_sec=result_cache_ttl_s) if result_cache_ttl_s > 0 else None
+        )
+
+        # Retriever: dense similarity search (cosine under the hood).
+        # Models are passed explicitly; llama_index's global Settings is
+        # left untouched so several instances can coexist.
         self.retriever = VectorIndexRetriever(
             index=self.index,
             similarity_top_k=self.retrieve_top_k,
+            embed_model=self.embed_model,
         )
 
         # Postprocessor 1: drop low-similarity nodes
@@ -136,6 +333,9 @@ class ThresholdedRAGReranker:
         embedding_model_name: str = "all-MiniLM-L6-v2",
         llm_model_name: str = "gpt-5",  # or "gemini-2.5-pro", etc.
         llm_provider: LLMProvider = "openai",  # "openai" or "gemini"
+        embedding_backend: EmbeddingBackend = "huggingface",
+        onnx_dir: Optional[str] = None,
+        embedding_device: Optional[str] = None,
     ) -> "ThresholdedRAGReranker":
         """
         Connect to an existing local ChromaDB collection (e.g. 'wcag_docs').
@@ -143,13 +343,17 @@ class ThresholdedRAGReranker:
         Args:
             persist_dir: path to Chroma's persistent directory (e.g. ./wcag_chroma).
             collection_name: Chroma collection name (e.g. 'wcag_docs').
-            similarity_cutoff: cosine similarity cutoff in [0,1].
+            similarity_cutoff: cosine similarity cutoff in [0,1]; <= 0 disables it.
             retrieve_top_k: initial # of candidates to retrieve before reranking.
             final_top_k: final # returned after reranking.
             embedding_model_name: HF / SentenceTransformers model name
                                   (e.g. 'all-MiniLM-L6-v2').
             llm_model_name: model used by LLMRerank ("gpt-5", "gemini-2.5-pro", etc).
             llm_provider: "openai" or "gemini".
+            embedding_backend: "huggingface" (PyTorch) or "optimum" (ONNX Runtime).
+            onnx_dir: where the ONNX export is cached for the "optimum" backend.
+            embedding_device: torch device for the embedding model (None = auto,
+                              i.e. CUDA when available).
         """
 
         # Normalize HF model name (accept both "all-MiniLM-L6-v2" and
@@ -160,26 +364,35 @@ class ThresholdedRAGReranker:
             hf_model_name = embedding_model_name
 
         # 1) Embedding model (must match what you used when adding docs to Chroma)
-        embed_model = HuggingFaceEmbedding(model_name=hf_model_name)
+        embed_model = make_embed_model(
+            embedding_backend, hf_model_name, onnx_dir, embedding_device
+        )
 
         # 2) LLM used by the reranker (GPT or Gemini depending on provider)
         llm = make_llm(llm_provider, llm_model_name)
 
-        # 3) Tell LlamaIndex to use THESE modules globally before building the index
-        Settings.embed_model = embed_model
-        Settings.llm = llm
-
-        # 4) Chroma client + collection
-        chroma_client = chromadb.PersistentClient(path=persist_dir)
-        collection = chroma_client.get_or_create_collection(collection_name)
+        # 3) Chroma client + collection. The HNSW settings only take effect
+        #    when the collection is created; an existing one keeps its own.
+        #    search_ef must cover retrieve_top_k for good recall.
+        chroma_client = _get_chroma_client(persist_dir)
+        collection = chroma_client.get_or_create_collection(
+            collection_name,
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": HNSW_M,
+                "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+                "hnsw:search_ef": max(HNSW_MIN_SEARCH_EF, retrieve_top_k * 2),
+            },
+        )
 
-        # 5) Wrap collection with LlamaIndex ChromaVectorStore
+        # 4) Wrap collection with LlamaIndex ChromaVectorStore
         vector_store = ChromaVectorStore(chroma_collection=collection)
         storage_context = StorageContext.from_defaults(vector_store=vector_store)
 
-        # 6) Build a VectorStoreIndex on top of that vector store
+        # 5) Build a VectorStoreIndex on top of that vector store
         index = VectorStoreIndex.from_vector_store(
             vector_store=vector_store,
+            embed_model=embed_model,
             storage_context=storage_context,
         )
 
@@ -190,6 +403,7 @@ class ThresholdedRAGReranker:
             similarity_cutoff=similarity_cutoff,
             retrieve_top_k=retrieve_top_k,
             final_top_k=final_top_k,
+            collection=collection,
         )
 
     # ------------------------------------------------------------------
@@ -206,6 +420,9 @@ class ThresholdedRAGReranker:
         embedding_model_name: str = "all-MiniLM-L6-v2",
         llm_model_name: str = "gpt-5.1-mini",
         llm_provider: LLMProvider = "openai",
+        embedding_backend: EmbeddingBackend = "huggingface",
+        onnx_dir: Optional[str] = None,
+        embedding_device: Optional[str] = None,
     ) -> "ThresholdedRAGReranker":
         """
         Build an in-memory index from a list of strings.
@@ -214,6 +431,7 @@ class ThresholdedRAGReranker:
             texts: list of document strings.
             metadata_list: optional list of metadata dicts per text.
             llm_provider: "openai" or "gemini".
+            embedding_backend: "huggingface" (PyTorch) or "optimum" (ONNX Runtime).
         """
         if metadata_list is None:
             metadata_list = [{} for _ in texts]
@@ -229,15 +447,13 @@ class ThresholdedRAGReranker:
         ]
 
         # 1) Embedding + LLM
-        embed_model = HuggingFaceEmbedding(model_name=hf_model_name)
+        embed_model = make_embed_model(
+            embedding_backend, hf_model_name, onnx_dir, embedding_device
+        )
         llm = make_llm(llm_provider, llm_model_name)
 
-        # 2) Use these modules for index construction
-        Settings.embed_model = embed_model
-        Settings.llm = llm
-
-        # 3) Index using these settings
-        index = VectorStoreIndex.from_documents(docs)
+        # 2) Index with this embedding model (no global Settings mutation)
+        index = VectorStoreIndex.from_documents(docs, embed_model=embed_model)
 
         return cls(
             index=index,
@@ -249,7 +465,107 @@ class ThresholdedRAGReranker:
         )
 
     # ------------------------------------------------------------------
-    # Common RAG method
+    # Embedding cache
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _embed_key(kind: str, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{kind}\x00{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def _cache_get(self, key: bytes) -> Any:
+        with self._embed_cache_lock:
+            return self._embed_cache.get(key)
+
+    def _cache_put(self, key: bytes, embedding: Any) -> None:
+        with self._embed_cache_lock:
+            self._embed_cache[key] = embedding
+            self._embed_cache.move_to_end(key)
+            while len(self._embed_cache) > EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Query embeddings, memoized by content hash. Misses are encoded in one
+        batch when the model embeds queries and documents the same way (see
+        queries_embed_as_texts); otherwise each miss goes through
+        get_query_embedding.
+        """
+        keys = [self._embed_key("query", q) for q in queries]
+        embeddings: List[Optional[List[float]]] = [self._cache_get(k) for k in keys]
+
+        todo = [i for i, e in enumerate(embeddings) if e is None]
+        if todo:
+            if self._batch_queries:
+                computed = self.embed_model.get_text_embedding_batch(
+                    [queries[i] for i in todo], show_progress=False
+                )
+            else:
+                computed = [self.embed_model.get_query_embedding(queries[i]) for i in todo]
+            for i, emb in zip(todo, computed):
+                embeddings[i] = emb
+
+        for k, emb in zip(keys, embeddings):
+            self._cache_put(k, emb)
+        return embeddings
+
+    def _embed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Document embeddings, memoized by content hash; misses are batched."""
+        keys = [self._embed_key("text", t) for t in texts]
+        embeddings: List[Optional[np.ndarray]] = [self._cache_get(k) for k in keys]
+
+        todo = [i for i, e in enumerate(embeddings) if e is None]
+        if todo:
+            computed = self.embed_model.get_text_embedding_batch(
+                [texts[i] for i in todo], show_progress=False
+            )
+            for i, emb in zip(todo, computed):
+                embeddings[i] = np.asarray(emb, dtype=np.float32)
+
+        for k, emb in zip(keys, embeddings):
+            self._cache_put(k, emb)
+        return embeddings
+
+    # ------------------------------------------------------------------
+    # Embedding lookup for final nodes
+    # ------------------------------------------------------------------
+    def _node_embeddings(self, nodes, texts: List[str]) -> List[np.ndarray]:
+        """
+        Return one float32 embedding per node, reusing what is already stored:
+          1) node.embedding, if the retriever populated it;
+          2) the Chroma collection's stored vector (from_chroma only);
+          3) otherwise a single batched embed of the remaining texts.
+        """
+        embeddings: List[Optional[np.ndarray]] = [
+            None if nws.node.embedding is None
+            else np.asarray(nws.node.embedding, dtype=np.float32)
+            for nws in nodes
+        ]
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+
+        if missing and self._collection is not None:
+            ids = [nodes[i].node.node_id for i in missing]
+            stored = self._collection.get(ids=ids, include=["embeddings"])
+            # Chroma may hand back a numpy array here, so no truthiness tests
+            stored_ids = stored.get("ids")
+            stored_embs = stored.get("embeddings")
+            if stored_ids is not None and stored_embs is not None:
+                by_id = dict(zip(stored_ids, stored_embs))
+                for i in missing:
+                    emb = by_id.get(nodes[i].node.node_id)
+                    if emb is not None:
+                        embeddings[i] = np.asarray(emb, dtype=np.float32)
+            missing = [i for i in missing if embeddings[i] is None]
+
+        if missing:
+            computed = self._embed_texts([texts[i] for i in missing])
+            for i, emb in zip(missing, computed):
+                embeddings[i] = emb
+
+        return embeddings
+
+    # ------------------------------------------------------------------
+    # Common RAG methods
     # ------------------------------------------------------------------
     def query(self, query_str: str) -> List[Dict[str, Any]]:
         """
@@ -261,19 +577,87 @@ class ThresholdedRAGReranker:
         4) Return up to final_top_k items, each with:
            - text
            - score
-           - metadata
-           - embedding (list[float])
+           - metadata (shared with the node; do not mutate)
+           - embedding (np.ndarray, float32; convert with .tolist() for JSON)
 
         Returns [] if:
           - no nodes pass the similarity cutoff, or
           - reranker returns nothing.
         """
+        return self.query_batch([query_str])[0]
 
-        # Step 1: retrieve candidates (NodeWithScore objects)
-        nodes = self.retriever.retrieve(query_str)
+    def query_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = 8,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run query() for many query strings at once.
 
-        # Step 2: similarity cutoff ("no good docs" filter)
-        nodes = self.similarity_pp.postprocess_nodes(nodes)
+        All query embeddings are computed up front in a single batched
+        encoder call. Retrieval, cutoff and LLM reranking then run per query,
+        up to max_concurrency queries at a time in a thread pool (the rerank
+        LLM calls are network-bound). Keep max_concurrency within the
+        provider's rate limits; 1 runs the queries sequentially.
+
+        Results of recent identical queries are served from a TTL cache
+        (shared objects; treat as read-only). Duplicate queries within one
+        batch are only run once.
+
+        Returns one result list per query, in input order.
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        keys = [self._embed_key("result", q) for q in queries]
+
+        # Indices of the first occurrence of every uncached query
+        todo: List[int] = []
+        first_by_key: Dict[bytes, int] = {}
+        for i, key in enumerate(keys):
+            cached = self._result_cache.get(key) if self._result_cache else None
+            if cached is not None:
+                results[i] = cached
+            elif key not in first_by_key:
+                first_by_key[key] = i
+                todo.append(i)
+
+        if todo:
+            query_embeddings = self._embed_queries([queries[i] for i in todo])
+            jobs = list(zip(todo, query_embeddings))
+
+            if max_concurrency <= 1 or len(jobs) <= 1:
+                for i, emb in jobs:
+                    results[i] = self._query_with_embedding(queries[i], emb)
+            else:
+                with ThreadPoolExecutor(max_workers=min(max_concurrency, len(jobs))) as ex:
+                    futures = {
+                        ex.submit(self._query_with_embedding, queries[i], emb): i
+                        for i, emb in jobs
+                    }
+                    for fut in as_completed(futures):
+                        results[futures[fut]] = fut.result()
+
+            for i in todo:
+                if self._result_cache is not None:
+                    self._result_cache.set(keys[i], results[i])
+
+        # Fill duplicates from their first occurrence
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = results[first_by_key[key]]
+        return results
+
+    def _query_with_embedding(
+        self, query_str: str, query_embedding: List[float]
+    ) -> List[Dict[str, Any]]:
+        # Step 1: retrieve candidates (NodeWithScore objects) using the
+        # precomputed query embedding, so the retriever skips the encoder
+        query_bundle = QueryBundle(query_str=query_str, embedding=query_embedding)
+        nodes = self.retriever.retrieve(query_bundle)
+
+        # Step 2: similarity cutoff ("no good docs" filter); a cutoff <= 0
+        # means "no threshold", so skip the pass entirely
+        if self.similarity_cutoff > 0.0:
+            nodes = self.similarity_pp.postprocess_nodes(nodes)
         if not nodes:
             return []  # "no good docs → don't use anything"
 
@@ -282,17 +666,17 @@ class ThresholdedRAGReranker:
         if not nodes:
             return []
 
-        # Step 4: compute embeddings for each final node
+        # Step 4: embeddings for the final nodes (stored ones reused when available)
+        texts = [nws.node.get_content() for nws in nodes]
+        embeddings = self._node_embeddings(nodes, texts)
+
         results: List[Dict[str, Any]] = []
-        for nws in nodes:
+        for nws, text, embedding in zip(nodes, texts, embeddings):
             node = nws.node
             score = nws.score
 
-            text = node.get_content()
-            metadata = dict(node.metadata or {})
-
-            # Embedding for this node's content (same model as Chroma expects)
-            embedding = self.embed_model.get_text_embedding(text)
+            # Not copied: callers must treat metadata as read-only
+            metadata = node.metadata or _EMPTY
 
             results.append(
                 {
@@ -306,6 +690,40 @@ class ThresholdedRAGReranker:
         return results
 
 
+@functools.lru_cache(maxsize=4)
+def get_chroma_rag(
+    persist_dir: str,
+    collection_name: str = "wcag_docs",
+    similarity_cutoff: float = 0.7,
+    retrieve_top_k: int = 20,
+    final_top_k: int = 5,
+    embedding_model_name: str = "all-MiniLM-L6-v2",
+    llm_model_name: str = "gpt-5",
+    llm_provider: LLMProvider = "openai",
+    embedding_backend: EmbeddingBackend = "huggingface",
+    onnx_dir: Optional[str] = None,
+    embedding_device: Optional[str] = None,
+) -> ThresholdedRAGReranker:
+    """
+    Process-wide ThresholdedRAGReranker.from_chroma(...), cached per argument
+    set, so callers that need the same collection share one embedding model,
+    collection handle and embedding/result caches instead of reloading them.
+    """
+    return ThresholdedRAGReranker.from_chroma(
+        persist_dir=persist_dir,
+        collection_name=collection_name,
+        similarity_cutoff=similarity_cutoff,
+        retrieve_top_k=retrieve_top_k,
+        final_top_k=final_top_k,
+        embedding_model_name=embedding_model_name,
+        llm_model_name=llm_model_name,
+        llm_provider=llm_provider,
+        embedding_backend=embedding_backend,
+        onnx_dir=onnx_dir,
+        embedding_device=embedding_device,
+    )
+
+
 def build_prompt_from_profile(profile: Dict[str, Any]) -> str:
     """
     Turn init_profile.json into a single query string for RAG.
@@ -335,6 +753,8 @@ def main() -> List[str]:
     PERSIST_DIR = "./wcag_chroma"       # Chroma DB directory
     COLLECTION_NAME = "wcag_docs"       # Chroma collection name
     EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: EmbeddingBackend = "huggingface"  # or "optimum" (ONNX)
+    EMBEDDING_DEVICE = None             # None = auto (CUDA if available)
 
     # Choose your reranker LLM here:
     LLM_PROVIDER: LLMProvider = "openai"      # "openai" or "gemini"
@@ -347,8 +767,8 @@ def main() -> List[str]:
     OUTPUT_PATH = "rag_output.json"     # output JSON
     # ======================
 
-    # 1) Build RAG helper from local ChromaDB
-    rag = ThresholdedRAGReranker.from_chroma(
+    # 1) Build (or reuse) RAG helper from local ChromaDB
+    rag = get_chroma_rag(
         persist_dir=PERSIST_DIR,
         collection_name=COLLECTION_NAME,
         similarity_cutoff=SIMILARITY_CUTOFF,
@@ -357,11 +777,13 @@ def main() -> List[str]:
         embedding_model_name=EMBEDDING_MODEL_NAME,
         llm_model_name=LLM_MODEL_NAME,
         llm_provider=LLM_PROVIDER,
+        embedding_backend=EMBEDDING_BACKEND,
+        embedding_device=EMBEDDING_DEVICE,
     )
 
     # 2) Load profile JSON once
-    with open(PROFILE_PATH, "r") as f:
-        profile = json.load(f)
+    with open(PROFILE_PATH, "rb") as f:
+        profile = orjson.loads(f.read())
 
     # 3) Build user_description string from the JSON
     user_description = build_prompt_from_profile(profile)
@@ -380,8 +802,8 @@ def main() -> List[str]:
     }
 
     # 7) Save to rag_output.json
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(output_data, f, indent=2)
+    with open(OUTPUT_PATH, "wb") as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
 
     # 8) Return the list of top strings so callers can use it
     return top_texts
@@ -6,11 +6,12 @@ index the WCAG failure techniques chosen by the user for dataset curation.
 
 from __future__ import annotations
 import argparse
-import json
+import orjson
+import os
 import shutil
 import re
 from pathlib import Path
-from typing import Dict, Any, Optional, Iterable, Set, List
+from typing import Dict, Any, Optional, Iterable, Iterator, Set, List, Tuple
 
 # Regular expression to filter out failures only
 WCAG_CODE_RE = re.compile(r"^(F\d+)", re.IGNORECASE)
@@ -38,10 +39,6 @@ def extract_wcag_code(filename: str) -> Optional[str]:
     return m.group(1).upper() if m else None
 
 
-def read_text(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="replace")
-
-
 def code_sort_key(code: str) -> int:
     try:
         return int(code[1:])
@@ -49,6 +46,47 @@ def code_sort_key(code: str) -> int:
         return 10**9
 
 
+def iter_wcag_files(root: str, allowed_codes: Set[str]) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Recursively yield (code, entry) for files under root whose WCAG code is in
+    allowed_codes, filtering during the walk so non-matching entries are never
+    collected. The code is returned so callers need not match the name again.
+    """
+    with os.scandir(root) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                yield from iter_wcag_files(e.path, allowed_codes)
+            elif e.is_file():
+                code = extract_wcag_code(e.name)
+                if code in allowed_codes:
+                    yield code, e
+
+
+def place_file(src: str, dst: Path, copy_mode: str) -> None:
+    """
+    Materialize src at dst. Technique files are read-only references, so a
+    hardlink (no byte copy) is safe; it falls back to a copy across filesystems.
+    """
+    # already in place (e.g. re-run over its own output, or a link to src);
+    # unlinking dst here would delete src itself
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+
+    if copy_mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    elif copy_mode == "symlink":
+        dst.symlink_to(Path(src).resolve())
+        return
+
+    shutil.copy2(src, dst)
+
+
 def build_arg_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser()
 
@@ -61,6 +99,13 @@ def build_arg_parser() -> argparse.ArgumentParser:
         choices=["non_functional", "functional", "both"],
         help="Which WCAG failure set to index",
     )
+    ap.add_argument(
+        "--copy_mode",
+        type=str,
+        default="hardlink",
+        choices=["hardlink", "copy", "symlink"],
+        help="How technique files are placed in the output folder",
+    )
     # Hyperparameters
     ap.add_argument("--first_k_non_functional", type=int, default=0,
                     help="If >0, only include first K non-functional codes")
@@ -88,9 +133,11 @@ def pick_allowed_codes(filter_mode: str,
     return set(nf) | set(fn)
 
 
-def main() -> None:
-    args = build_arg_parser().parse_args()
-
+def run(args: argparse.Namespace) -> int:
+    """
+    Index the WCAG failures selected by args and return the number of rules.
+    Callable in-process (see run_pipeline) or via main().
+    """
     wcag_dir = Path(args.wcag_dir).expanduser().resolve()
     out_dir = Path(args.out_dir).expanduser().resolve()
     out_rules_dir = out_dir / "wcag_common_failures"
@@ -107,31 +154,27 @@ def main() -> None:
 
     rules: List[Dict[str, Any]] = []
 
-    # Picking desired F WCAG files
-    for p in sorted(wcag_dir.rglob("*")):
-        if not p.is_file():
-            continue
-
-        wcag_code = extract_wcag_code(p.name)
-        if not wcag_code:
-            continue
-
-        if wcag_code not in allowed_codes:
-            continue
-
-        # Copy file into curated folder
+    # Picking desired F WCAG files (only the matches are sorted)
+    matches = sorted(
+        iter_wcag_files(str(wcag_dir), allowed_codes),
+        key=lambda ce: (code_sort_key(ce[0]), ce[1].name),
+    )
+    for _, p in matches:
+        # Link / copy file into curated folder
         index_wcag = out_rules_dir / p.name
-        shutil.copy2(p, index_wcag)
+        place_file(p.path, index_wcag, args.copy_mode)
 
         technique_id = index_wcag.stem
-        technique_path = index_wcag.relative_to(Path.cwd()).as_posix()
+        # absolute (out_dir is resolved), so generation can read the file
+        # from any working directory
+        technique_path = index_wcag.as_posix()
 
+        # Metadata only; consumers read the technique text from "path"
         entry: Dict[str, Any] = {
             "rule_id": technique_id,
             "error_class": args.filter_mode,
             "file": p.name,
             "path": technique_path,
-            "content": read_text(index_wcag),
         }
         rules.append(entry)
 
@@ -146,8 +189,13 @@ def main() -> None:
     }
 
     out_index = out_dir / "index_wcag_techniques.json"
-    out_index.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    out_index.write_bytes(orjson.dumps(index, option=orjson.OPT_INDENT_2))
     print(f"Wrote {len(rules)} rules -> {out_index}")
+    return len(rules)
+
+
+def main() -> None:
+    run(build_arg_parser().parse_args())
 
 
 if __name__ == "__main__":
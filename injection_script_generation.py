@@ -13,15 +13,23 @@ This version:
 from __future__ import annotations
 
 import argparse
-import json
+import asyncio
+import functools
+import gzip
+import hashlib
+import itertools
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
 
-from openai import OpenAI
+import ijson
+import orjson
+import lxml.html
+from lxml import etree
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 
 load_dotenv()
 
@@ -30,6 +38,9 @@ load_dotenv()
 DEFAULT_MODEL = "gpt-5.2"
 MAX_HTML_CHARS = 12_000       # safe cap after JS removal
 SLEEP_BETWEEN_CALLS_S = 0.25
+MAX_CONCURRENCY = 4           # in-flight OpenAI requests
+RESPONSE_CACHE_DIR = ".openai_cache"
+STRIP_WORKERS = 0             # HTML-stripping processes; 0 = os.cpu_count()
 # --------------------------------------------------------------------------
 
 
@@ -45,7 +56,88 @@ def extract_json_object(text: str) -> Dict[str, Any]:
     if start == -1 or end == -1 or end <= start:
         raise ValueError(f"Could not locate JSON object in model output:\n{text[:500]}")
 
-    return json.loads(text[start:end + 1])
+    return orjson.loads(text[start:end + 1])
+
+
+# ------------------------ Source streaming --------------------------------
+
+def iter_sources(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream entries of "source_code_list" one at a time, so only the current
+    site's HTML is held in memory rather than the whole scrape output.
+    """
+    with path.open("rb") as f:
+        yield from ijson.items(f, "source_code_list.item", use_float=True)
+
+
+def load_source_code(site: Dict[str, Any]) -> str:
+    """Page HTML of a scrape entry, inline or from its gzip sidecar file."""
+    path = site.get("Source_code_path")
+    if path:
+        return gzip.decompress(Path(path).read_bytes()).decode("utf-8")
+    return site.get("Source_code") or ""
+
+
+def site_static_html(site: Dict[str, Any]) -> str:
+    return prepare_static_html(load_source_code(site))
+
+
+# ------------------------- NDJSON output ----------------------------------
+
+def write_ndjson_record(f: BinaryIO, record: Dict[str, Any]) -> None:
+    """Append one record as a JSON line and flush, so progress survives crashes."""
+    f.write(orjson.dumps(record) + b"\n")
+    f.flush()
+
+
+def _copy_ndjson_items(src: Path, out: BinaryIO) -> int:
+    count = 0
+    with src.open("rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if count:
+                out.write(b",\n")
+            out.write(line)
+            count += 1
+    return count
+
+
+def aggregate_ndjson(out_path: Path, injections_ndjson: Path, failures_ndjson: Path) -> int:
+    """
+    Re-assemble the NDJSON logs into the {"injections": [...], "failures": [...]}
+    file read by selenium_injection.py, one line at a time.
+    Returns the number of injections written.
+    """
+    with out_path.open("wb") as out:
+        out.write(b'{"injections": [\n')
+        count = _copy_ndjson_items(injections_ndjson, out)
+        out.write(b'\n],\n"failures": [\n')
+        _copy_ndjson_items(failures_ndjson, out)
+        out.write(b"\n]}\n")
+    return count
+
+
+# ------------------------ Response cache ----------------------------------
+
+def response_cache_path(cache_dir: Path, model: str, prompt: str) -> Path:
+    """One file per (model, prompt); changing either misses the cache."""
+    key = hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.json"
+
+
+def load_cached_response(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_response(path: Path, obj: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(orjson.dumps(obj))
+    tmp.replace(path)
 
 
 # ---------------------- WCAG helpers --------------------------------------
@@ -63,12 +155,29 @@ def get_technique_id(t: Dict[str, Any]) -> Optional[str]:
     return str(tid).strip().upper() if tid else None
 
 
+@functools.lru_cache(maxsize=None)
+def read_technique_file(path: str) -> str:
+    return Path(path).read_text(encoding="utf-8", errors="replace")
+
+
 def get_technique_text(t: Dict[str, Any]) -> str:
-    return (t.get("content") or "").strip()
+    # Older indexes embed the text; current ones only record the file path
+    if t.get("content"):
+        return t["content"].strip()
+    path = t.get("path")
+    return read_technique_file(path).strip() if path else ""
 
 
 # --------------------- JavaScript stripping --------------------------------
 
+# Elements whose @href/@src starts with "javascript:" (any case, leading
+# whitespace ignored)
+_JS_URL_XPATH = (
+    "//*[starts-with(translate(normalize-space(@{attr}), "
+    "'JAVSCRIPT', 'javscript'), 'javascript:')]"
+)
+
+
 def strip_all_javascript(html: str) -> str:
     """
     Return a static HTML snapshot by removing all JavaScript content.
@@ -85,37 +194,54 @@ def strip_all_javascript(html: str) -> str:
       - Semantic HTML
       - CSS classes and inline styles
     """
-    soup = BeautifulSoup(html, "lxml")
-
-    # Remove script sources
-    for tag in soup.find_all(["script", "noscript"]):
-        tag.decompose()
-
-    # Remove inline JS handlers and javascript: URLs
-    for tag in soup.find_all(True):
-        for attr in list(tag.attrs.keys()):
-            if attr.lower().startswith("on"):
-                del tag.attrs[attr]
-
-        if tag.has_attr("href") and isinstance(tag["href"], str):
-            if tag["href"].strip().lower().startswith("javascript:"):
-                tag["href"] = "#"
-
-        if tag.has_attr("src") and isinstance(tag["src"], str):
-            if tag["src"].strip().lower().startswith("javascript:"):
-                del tag.attrs["src"]
-
-    return str(soup)
-
-
-# ------------------------- Prompting --------------------------------------
-
-def build_prompt(url: str, html: str, technique_id: str, technique_text: str) -> str:
+    if not html.strip():
+        return ""
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration must be parsed as bytes
+        root = lxml.html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        # No elements at all (e.g. an error comment), so nothing to strip
+        return html
+
+    # Remove script sources (keeping any text that follows them)
+    etree.strip_elements(root, "script", "noscript", with_tail=False)
+
+    # Remove inline JS handlers; the HTML parser lowercases attribute names,
+    # so a single XPath pass selects every on* attribute
+    for attr in root.xpath("//@*[starts-with(name(), 'on')]"):
+        del attr.getparent().attrib[attr.attrname]
+
+    # Neutralize javascript: URLs
+    for tag in root.xpath(_JS_URL_XPATH.format(attr="href")):
+        tag.set("href", "#")
+    for tag in root.xpath(_JS_URL_XPATH.format(attr="src")):
+        del tag.attrib["src"]
+
+    # libxml2 invents an HTML 4.0 doctype for pages without one; only
+    # serialize the document (with its doctype) when the page had one
+    node = root.getroottree() if "<!doctype" in html[:2048].lower() else root
+    return etree.tostring(node, encoding="unicode", method="html")
+
+
+def prepare_static_html(html: str) -> str:
+    """Strip JavaScript and hard-cap the snapshot; done once per site."""
     static_html = strip_all_javascript(html)
     if len(static_html) > MAX_HTML_CHARS:
         static_html = static_html[:MAX_HTML_CHARS] + "\n<!-- TRUNCATED -->"
+    return static_html
+
+
+# ------------------------- Prompting --------------------------------------
 
-    return f"""
+@functools.lru_cache(maxsize=None)
+def technique_prompt_parts(technique_id: str, technique_text: str) -> Tuple[str, str]:
+    """
+    The parts of the prompt that depend only on the technique, rendered once
+    and shared by every site: (head up to "URL: ", tail after the HTML).
+    """
+    head = f"""
     You are generating a JavaScript injection snippet for accessibility research.
 
     ABSOLUTE RULES (must follow):
@@ -137,11 +263,9 @@ def build_prompt(url: str, html: str, technique_id: str, technique_text: str) ->
     b) if none found, gracefully do nothing and set notes explaining "no suitable target found"
     c) modify an existing element in a way that introduces failure technique {technique_id}
 
-    URL: {url}
+    URL: """.lstrip()
 
-    Static HTML snapshot (JavaScript removed):
-    <<<HTML
-    {static_html}
+    tail = f"""
     HTML>>>
 
     Technique description:
@@ -154,26 +278,105 @@ def build_prompt(url: str, html: str, technique_id: str, technique_text: str) ->
     "injection_js": "...",
     "notes": "..."
     }}
-    """.strip()
+    """.rstrip()
 
+    return head, tail
 
 
-def gpt_generate_injection(
-    client: OpenAI,
+def build_prompt(url: str, static_html: str, technique_id: str, technique_text: str) -> str:
+    """static_html is the output of prepare_static_html for this site."""
+    head, tail = technique_prompt_parts(technique_id, technique_text)
+    return (
+        f"{head}{url}\n\n"
+        f"    Static HTML snapshot (JavaScript removed):\n"
+        f"    <<<HTML\n"
+        f"    {static_html}{tail}"
+    )
+
+
+async def gpt_generate_injection(
+    client: AsyncOpenAI,
     model: str,
     url: str,
-    html: str,
+    static_html: str,
     technique_id: str,
     technique_text: str,
+    cache_dir: Optional[Path] = None,
 ) -> Dict[str, Any]:
-    prompt = build_prompt(url, html, technique_id, technique_text)
+    prompt = build_prompt(url, static_html, technique_id, technique_text)
 
-    resp = client.responses.create(
+    # Identical prompts from earlier runs are answered from disk
+    cache_path: Optional[Path] = None
+    if cache_dir is not None:
+        cache_path = response_cache_path(cache_dir, model, prompt)
+        cached = load_cached_response(cache_path)
+        if cached is not None:
+            return cached
+
+    resp = await client.responses.create(
         model=model,
         input=[{"role": "user", "content": prompt}],
     )
 
-    return extract_json_object(resp.output_text)
+    obj = extract_json_object(resp.output_text)
+    if cache_path is not None:
+        save_cached_response(cache_path, obj)
+    return obj
+
+
+async def generate_site_injections(
+    client: AsyncOpenAI,
+    sem: asyncio.Semaphore,
+    model: str,
+    url: str,
+    static_html: str,
+    site_techniques: List[Tuple[str, str]],
+    sleep_s: float,
+    inj_out: BinaryIO,
+    fail_out: BinaryIO,
+    cache_dir: Optional[Path] = None,
+) -> None:
+    """
+    Generate injections for one site, one request per technique, run
+    concurrently. sem bounds the in-flight requests across the whole run;
+    sleep_s spaces out consecutive requests on each slot.
+    Each result is appended to inj_out / fail_out (NDJSON) as it completes.
+    """
+
+    async def one(technique_id: str, technique_text: str):
+        async with sem:
+            print(f"{url} × {technique_id}")
+            try:
+                gen = await gpt_generate_injection(
+                    client=client,
+                    model=model,
+                    url=url,
+                    static_html=static_html,
+                    technique_id=technique_id,
+                    technique_text=technique_text,
+                    cache_dir=cache_dir,
+                )
+                write_ndjson_record(inj_out, {
+                    "url": url,
+                    "WCAG_technique": {
+                        "technique_id": technique_id,
+                        "technique_text": technique_text,
+                    },
+                    "injection": gen,
+                })
+            except Exception as e:
+                print(f"[WARN] Failed {url} × {technique_id}: {e}")
+                write_ndjson_record(fail_out, {
+                    "url": url,
+                    "technique_id": technique_id,
+                    "error": str(e),
+                    "timestamp_unix": time.time(),
+                })
+            finally:
+                if sleep_s > 0:
+                    await asyncio.sleep(sleep_s)
+
+    await asyncio.gather(*(one(tid, text) for tid, text in site_techniques))
 
 
 # ----------------------------- CLI ----------------------------------------
@@ -190,13 +393,97 @@ def build_arg_parser() -> argparse.ArgumentParser:
     ap.add_argument("--max_techniques", type=int, default=0)
     ap.add_argument("--limit_per_site", type=int, default=0)
     ap.add_argument("--sleep_s", type=float, default=SLEEP_BETWEEN_CALLS_S)
+    ap.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                    help="Max concurrent OpenAI requests")
+    ap.add_argument("--cache_dir", type=str, default=RESPONSE_CACHE_DIR,
+                    help="Directory for cached model responses")
+    ap.add_argument("--no_cache", action="store_true",
+                    help="Always call the model; neither read nor write the cache")
+    ap.add_argument("--strip_workers", type=int, default=STRIP_WORKERS,
+                    help="Processes stripping HTML ahead of the model calls (0 = CPU count)")
 
     return ap
 
 
-def main() -> None:
-    args = build_arg_parser().parse_args()
-
+async def generate_all(
+    args: argparse.Namespace,
+    sources: Iterator[Dict[str, Any]],
+    techniques: List[Dict[str, Any]],
+    inj_out: BinaryIO,
+    fail_out: BinaryIO,
+) -> None:
+    sem = asyncio.Semaphore(max(1, args.concurrency))
+
+    cache_dir: Optional[Path] = None
+    if not args.no_cache:
+        cache_dir = Path(args.cache_dir).expanduser().resolve()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Techniques are the same for every site: resolve (id, text) once
+    tech_ids = [(tid, t) for tid, t in ((get_technique_id(t), t) for t in techniques) if tid]
+    if args.limit_per_site > 0:
+        tech_ids = tech_ids[: args.limit_per_site]
+    site_techniques: List[Tuple[str, str]] = [
+        (tid, get_technique_text(t)) for tid, t in tech_ids
+    ]
+
+    # Several sites are in flight at once, so the semaphore (not the
+    # technique count of one site) bounds the requests across all
+    # site × technique pairs. Each site's page is parsed + stripped in a
+    # worker process as soon as it is scheduled, overlapping the CPU work
+    # with the model calls of the sites before it.
+    workers = args.strip_workers if args.strip_workers > 0 else (os.cpu_count() or 1)
+    per_site = max(1, len(site_techniques))
+    window = max(2 * workers, -(-args.concurrency // per_site) + 1)
+    loop = asyncio.get_running_loop()
+    sites = ((i, s) for i, s in enumerate(sources) if s.get("Url"))
+
+    async def process_site(
+        client: AsyncOpenAI, s_idx: int, url: str, stripped: "asyncio.Future[str]"
+    ) -> None:
+        # Every technique reuses the one stripped snapshot of the page;
+        # a page that cannot be read or parsed fails all its techniques
+        try:
+            static_html = await stripped
+        except Exception as e:
+            print(f"[WARN] Failed to prepare {url}: {e}")
+            for technique_id, _ in site_techniques:
+                write_ndjson_record(fail_out, {
+                    "url": url,
+                    "technique_id": technique_id,
+                    "error": str(e),
+                    "timestamp_unix": time.time(),
+                })
+            return
+
+        print(f"[site {s_idx+1}] {url}: {len(site_techniques)} techniques")
+        await generate_site_injections(
+            client, sem, args.model, url, static_html, site_techniques, args.sleep_s,
+            inj_out, fail_out, cache_dir,
+        )
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async with AsyncOpenAI() as client:
+            running: Set["asyncio.Task[None]"] = set()
+            for s_idx, site in sites:
+                if len(running) >= window:
+                    done, running = await asyncio.wait(
+                        running, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+                stripped = loop.run_in_executor(pool, site_static_html, site)
+                running.add(asyncio.create_task(
+                    process_site(client, s_idx, site["Url"], stripped)
+                ))
+            await asyncio.gather(*running)
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Generate injections for the sources described by args and return the
+    number written. Callable in-process (see run_pipeline) or via main().
+    """
     if not os.getenv("OPENAI_API_KEY"):
         raise RuntimeError("OPENAI_API_KEY environment variable not set.")
 
@@ -205,78 +492,31 @@ def main() -> None:
     out_path = Path(args.out_json).expanduser().resolve()
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    src_obj = json.loads(source_path.read_text(encoding="utf-8"))
-    wcag_obj = json.loads(wcag_path.read_text(encoding="utf-8"))
-
-    sources: List[Dict[str, Any]] = src_obj.get("source_code_list", [])
+    # The technique index is small; the source list is streamed per site
+    wcag_obj = orjson.loads(wcag_path.read_bytes())
     techniques: List[Dict[str, Any]] = get_techniques(wcag_obj)
 
+    sources: Iterator[Dict[str, Any]] = iter_sources(source_path)
     if args.max_sites > 0:
-        sources = sources[: args.max_sites]
+        sources = itertools.islice(sources, args.max_sites)
     if args.max_techniques > 0:
         techniques = techniques[: args.max_techniques]
 
-    client = OpenAI()
-
-    injections: List[Dict[str, Any]] = []
-    failures: List[Dict[str, Any]] = []
-
-    for s_idx, site in enumerate(sources):
-        url = site.get("Url")
-        html = site.get("Source_code") or ""
-        if not url:
-            continue
+    # Results are streamed to NDJSON as they complete, then re-assembled
+    # into the single JSON document expected downstream
+    injections_ndjson = out_path.with_suffix(".ndjson")
+    failures_ndjson = out_path.with_suffix(".failures.ndjson")
+    with injections_ndjson.open("wb") as inj_out, \
+            failures_ndjson.open("wb") as fail_out:
+        asyncio.run(generate_all(args, sources, techniques, inj_out, fail_out))
 
-        used = 0
-        for tech in techniques:
-            technique_id = get_technique_id(tech)
-            if not technique_id:
-                continue
-
-            technique_text = get_technique_text(tech)
-            print(f"[{s_idx+1}/{len(sources)}] {url} × {technique_id}")
+    count = aggregate_ndjson(out_path, injections_ndjson, failures_ndjson)
+    print(f"Wrote {count} injections → {out_path}")
+    return count
 
-            try:
-                gen = gpt_generate_injection(
-                    client=client,
-                    model=args.model,
-                    url=url,
-                    html=html,
-                    technique_id=technique_id,
-                    technique_text=technique_text,
-                )
 
-                injections.append({
-                    "url": url,
-                    "WCAG_technique": {
-                        "technique_id": technique_id,
-                        "technique_text": technique_text,
-                    },
-                    "injection": gen,
-                })
-
-            except Exception as e:
-                failures.append({
-                    "url": url,
-                    "technique_id": technique_id,
-                    "error": str(e),
-                    "timestamp_unix": time.time(),
-                })
-                print(f"[WARN] Failed {url} × {technique_id}: {e}")
-
-            used += 1
-            if args.limit_per_site > 0 and used >= args.limit_per_site:
-                break
-
-            if args.sleep_s > 0:
-                time.sleep(args.sleep_s)
-
-    out_path.write_text(
-        json.dumps({"injections": injections, "failures": failures}, indent=2),
-        encoding="utf-8",
-    )
-
-    print(f"Wrote {len(injections)} injections → {out_path}")
+def main() -> None:
+    run(build_arg_parser().parse_args())
 
 
 if __name__ == "__main__":
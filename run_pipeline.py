@@ -11,9 +11,13 @@ It includes the following steps:
 """
 
 from __future__ import annotations
-import subprocess
-import sys
 from pathlib import Path
+from types import ModuleType
+
+import collect_wcag_failures
+import injection_script_generation
+import scrape_websites
+import selenium_injection
 
 
 # ======================= CONFIGURATION VARIABLES =============================
@@ -27,15 +31,27 @@ DATASET_WCAG_TECHNIQUES = "out/index_wcag_techniques.json"
 
 # Screenshots directory
 SCREENSHOT_DIR = "out/screenshots"
+SCREENSHOT_FORMAT = "webp"  # "webp", "jpeg" or "png"
+
+# Page HTML as gzip sidecar files instead of inline JSON ("" keeps it inline)
+HTML_DIR = ""
 
 # Scraping hyperparameters 
 REQUEST_SLEEP_S = 1.0
 SELENIUM_HEADLESS = True
+HEADLESS_MODE = "new"       # "old" = legacy headless (faster start, older Chrome only)
+REVIEW_HEADLESS = False
 PAGE_LOAD_TIMEOUT_S = 10
 POST_INJECT_WAIT_S = 5.0
+REVIEW_PREFETCH = 1     # review items prepared ahead (one extra browser each)
+REVIEW_REUSE_PAGE = False   # restore the DOM instead of reloading (injections may leak)
 DOM_READY_TIMEOUT_S = 5
-EXTRA_WAIT_S = 2
+SETTLE_QUIET_MS = 500    # page settled after this long without DOM changes
+MAX_SETTLE_MS = 5000     # ... or after this long at most
 MAX_SITES = 5
+SCRAPE_CONCURRENCY = 5
+STATIC_FETCH = False    # plain HTTP for script-free pages, Chrome otherwise
+BLOCK_RESOURCES = False # skip images/fonts/media/analytics while scraping
 
 # WCAG scraping hyperparameters
 NUM_TECHNIQUES = 4
@@ -45,16 +61,15 @@ FIRST_K_FUNCTIONAL_CODES = 4
 
 
 """
-Run the subprocess command for each of the pipeline
+Run a pipeline stage in this process with the same arguments its CLI takes
 """
-def run(cmd: list[str]) -> None:
-    print("\n>>>", " ".join(cmd))
-    subprocess.run(cmd, check=True)
+def run_in_process(stage: ModuleType, argv: list[str]) -> None:
+    print("\n>>>", stage.__name__, " ".join(argv))
+    args = stage.build_arg_parser().parse_args(argv)
+    stage.run(args)
 
 
 def main() -> None:
-    py = sys.executable
-
     out_dir = Path(OUT_DIR).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -65,8 +80,7 @@ def main() -> None:
 
 
     # 1) Collect WCAG failure content###########################################
-    run([
-        py, "collect_wcag_failures.py",
+    run_in_process(collect_wcag_failures, [
         "--wcag_dir", WCAG_DIR,
         "--out_dir", str(out_dir),
         "--filter_mode", "non_functional",
@@ -74,29 +88,36 @@ def main() -> None:
         "--first_k_functional", str(FIRST_K_FUNCTIONAL_CODES),
     ])
 
-    # 2) Collect website source code#############################################
-    cmd2 = [
-        py, "scrape_websites.py",
+    # 2) Collect website source code#########################################
+    argv2 = [
         "--in_json", WEBSITES_JSON,
         "--out_json", str(source_code_json),
         "--page_load_timeout_s", str(PAGE_LOAD_TIMEOUT_S),
         "--dom_ready_timeout_s", str(DOM_READY_TIMEOUT_S),
-        "--extra_wait_s", str(EXTRA_WAIT_S),
+        "--quiet_ms", str(SETTLE_QUIET_MS),
+        "--max_settle_ms", str(MAX_SETTLE_MS),
         "--sleep_between_sites_s", str(REQUEST_SLEEP_S),
-        "--screenshot_dir", str(SCREENSHOT_DIR)
+        "--max_concurrency", str(SCRAPE_CONCURRENCY),
+        "--screenshot_dir", str(SCREENSHOT_DIR),
+        "--screenshot_format", SCREENSHOT_FORMAT,
     ]
     # speeds up dataset curation runtime
     if SELENIUM_HEADLESS:
-        cmd2.append("--headless")
+        argv2.extend(["--headless", "--headless_mode", HEADLESS_MODE])
+    if STATIC_FETCH:
+        argv2.append("--static_fetch")
+    if BLOCK_RESOURCES:
+        argv2.append("--block_resources")
+    if HTML_DIR:
+        argv2.extend(["--html_dir", str(Path(HTML_DIR) / "source")])
     # if max_sites is not set for the user
     if MAX_SITES > 0:
-        cmd2.extend(["--max_sites", str(MAX_SITES)])
-    run(cmd2)
+        argv2.extend(["--max_sites", str(MAX_SITES)])
+    run_in_process(scrape_websites, argv2)
 
 
-    # 3) Injection script generation###############################################
-    run([
-        py, "injection_script_generation.py",
+    # 3) Injection script generation###########################################
+    run_in_process(injection_script_generation, [
         "--source_code_json", str(source_code_json),
         "--index_wcag_techniques", str(DATASET_WCAG_TECHNIQUES),
         "--out_json", str(injection_json),
@@ -104,20 +125,25 @@ def main() -> None:
     ])
 
 
-    # 4) Selenium injection for dataset selection##################################
-    cmd4 = [
-        py, "selenium_injection.py",
+    # 4) Selenium injection for dataset selection##############################
+    argv4 = [
         "--injection_json", str(injection_json),
         "--out_json", str(final_json),
         "--page_load_timeout_s", str(PAGE_LOAD_TIMEOUT_S),
         "--post_inject_wait_s", str(POST_INJECT_WAIT_S),
+        "--prefetch", str(REVIEW_PREFETCH),
     ]
-    # if SELENIUM_HEADLESS:
-    #     cmd4.append("--headless")
     if SCREENSHOT_DIR:
         Path(SCREENSHOT_DIR).mkdir(parents=True, exist_ok=True)
-        cmd4.extend(["--screenshot_dir", SCREENSHOT_DIR])
-    run(cmd4)
+        argv4.extend(["--screenshot_dir", SCREENSHOT_DIR])
+        argv4.extend(["--screenshot_format", SCREENSHOT_FORMAT])
+    if HTML_DIR:
+        argv4.extend(["--html_dir", str(Path(HTML_DIR) / "injected")])
+    if REVIEW_HEADLESS:
+        argv4.append("--headless")
+    if REVIEW_REUSE_PAGE:
+        argv4.append("--reuse_page")
+    run_in_process(selenium_injection, argv4)
 
     print("\n[PIPELINE COMPLETE]")
     print("Final dataset path ->    ", final_json)
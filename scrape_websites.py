@@ -6,32 +6,177 @@ websites that are provided by the user
 
 from __future__ import annotations
 import argparse
-import json
+import base64
+import gzip
+import hashlib
+import queue
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
+import lxml.html
+import orjson
+import requests
+from lxml import etree
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
 
-def build_driver(headless: bool) -> webdriver.Chrome:
-    # Building the selenium driver with provided options
+# Static fast path: a page is taken as-is when it is HTML and has no <script>
+# in its first STATIC_SNIFF_CHARS characters
+STATIC_SNIFF_CHARS = 20_000
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# On-disk scrape cache (one gzip JSON per URL), reused across runs
+SCRAPE_CACHE_TTL_S = 7 * 24 * 3600
+
+# Requests dropped with --block_resources: bytes that never reach
+# page_source. Stylesheets stay so screenshots keep their layout.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+]
+
+# Quality of lossy (webp / jpeg) screenshots
+SCREENSHOT_QUALITY = 75
+
+# Chrome features that add start-up work or background stalls and are
+# irrelevant to scraping
+DISABLED_CHROME_FEATURES = [
+    "Translate", "AcceptCHFrame", "MediaRouter",
+    "OptimizationHints", "IsolateSandboxedIframes",
+]
+
+# Settle wait run in the page after DOM ready: resolves once the document is
+# complete and no DOM mutation was seen for quiet_ms, or after max_settle_ms.
+# It resolves with [url, title] so those cost no extra WebDriver round-trip.
+SETTLE_JS = """
+const [quietMs, maxMs, done] = arguments;
+let quiet = null, finished = false;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quiet);
+    clearTimeout(cap);
+    done([location.href, document.title]);
+};
+const arm = () => {
+    clearTimeout(quiet);
+    quiet = setTimeout(
+        () => document.readyState === "complete" ? finish() : arm(), quietMs);
+};
+const observer = new MutationObserver(arm);
+observer.observe(document, {
+    subtree: true, childList: true, attributes: true, characterData: true,
+});
+const cap = setTimeout(finish, maxMs);
+arm();
+"""
+
+# Page HTML read over CDP (doctype kept, as page_source has it)
+PAGE_HTML_EXPR = (
+    "(document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '')"
+    " + document.documentElement.outerHTML"
+)
+
+# One HTTP session per worker thread, so connections and TLS are reused
+_http = threading.local()
+
+# entry key holding the pending screenshot write until the entry is emitted
+SHOT_WRITE_KEY = "_screenshot_write"
+
+
+def build_driver(
+    headless: bool,
+    block_resources: bool = False,
+    headless_mode: str = "new",
+) -> webdriver.Chrome:
+    # Building the selenium driver with provided options.
+    # headless_mode "old" is the lighter legacy headless; Chrome 132+ only
+    # ships it as the separate chrome-headless-shell binary.
     opts = Options()
+    # driver.get returns at DOMContentLoaded; the settle wait (which also
+    # waits for readyState "complete", up to max_settle_ms) covers the rest
+    opts.page_load_strategy = "eager"
     if headless:
-        opts.add_argument("--headless=new")
+        opts.add_argument("--headless" if headless_mode == "old" else "--headless=new")
+    opts.add_argument(f"--disable-features={','.join(DISABLED_CHROME_FEATURES)}")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--window-size=1280,900")
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
+    opts.add_argument(f"--user-agent={USER_AGENT}")
+    if block_resources:
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
 
+    # URL blocking is per tab (CDP target), see block_urls
     return webdriver.Chrome(options=opts)
 
 
+def block_urls(driver: webdriver.Chrome) -> None:
+    # CDP network settings only apply to the current tab, so this must run
+    # in every tab a page is loaded in
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+def _write_shot(shot_path: Path, data_b64: str) -> None:
+    shot_path.write_bytes(base64.b64decode(data_b64))
+
+
+def save_screenshot(
+    driver: webdriver.Chrome,
+    shot_path: Path,
+    fmt: str,
+    writer: Optional[ThreadPoolExecutor] = None,
+) -> Tuple[Path, Optional[Future]]:
+    """
+    Save a viewport screenshot as shot_path with fmt's suffix. Chrome encodes
+    it via CDP (webp/jpeg are several times smaller than png). Only the
+    capture needs the driver: with a writer, decoding and writing the file
+    happen on that executor while the driver moves on to the next page, and
+    the write's future is returned so its outcome can be checked.
+    """
+    shot_path = shot_path.with_suffix(f".{fmt}")
+    params: Dict[str, Any] = {"format": fmt}
+    if fmt != "png":
+        params["quality"] = SCREENSHOT_QUALITY
+    data_b64 = driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"]
+    if writer is not None:
+        return shot_path, writer.submit(_write_shot, shot_path, data_b64)
+    _write_shot(shot_path, data_b64)
+    return shot_path, None
+
+
+def finish_screenshot(entry: Dict[str, Any]) -> None:
+    """
+    Wait for entry's pending screenshot write (if any) and drop
+    Screenshot_path when the file could not be written.
+    """
+    shot_write = entry.pop(SHOT_WRITE_KEY, None)
+    if shot_write is None:
+        return
+    try:
+        shot_write.result()
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Screenshot not written for {entry['Url']}: {e}")
+        entry["Screenshot_path"] = None
+
+
 def wait_for_dom_ready(driver: webdriver.Chrome, timeout_s: int) -> None:
     # Used to load the webpage for the driver
     # which usually includes some amount of delay time
@@ -40,6 +185,135 @@ def wait_for_dom_ready(driver: webdriver.Chrome, timeout_s: int) -> None:
     )
 
 
+def wait_for_dom_settled(
+    driver: webdriver.Chrome, quiet_ms: int, max_settle_ms: int
+) -> Optional[List[str]]:
+    # Returns as soon as the page stops changing instead of a fixed sleep,
+    # with the page's [url, title]; the script timeout must exceed
+    # max_settle_ms (see run)
+    try:
+        if max_settle_ms <= 0:
+            return driver.execute_script("return [location.href, document.title];")
+        return driver.execute_async_script(SETTLE_JS, quiet_ms, max_settle_ms)
+    except WebDriverException:
+        return None
+
+
+def get_page_html(driver: webdriver.Chrome) -> str:
+    # One CDP Runtime.evaluate instead of WebDriver's page_source command,
+    # which goes through an extra script-execution layer and JSON wrapping
+    result = driver.execute_cdp_cmd(
+        "Runtime.evaluate", {"expression": PAGE_HTML_EXPR, "returnByValue": True}
+    )
+    value = result.get("result", {}).get("value")
+    if "exceptionDetails" in result or not isinstance(value, str):
+        return driver.page_source
+    return value
+
+
+def _http_session() -> requests.Session:
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        _http.session = session
+    return session
+
+
+def try_static_fetch(url: str, timeout_s: float) -> Optional[Dict[str, Any]]:
+    """
+    Fetch url over plain HTTP. Returns the page fields when the response is
+    HTML without scripts (so a browser would render the same DOM), else None
+    and the caller falls back to Selenium.
+    """
+    try:
+        r = _http_session().get(url, timeout=timeout_s, allow_redirects=True)
+        r.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    content_type = r.headers.get("content-type", "").lower()
+    if not content_type.startswith("text/html"):
+        return None
+    if "charset" not in content_type:
+        r.encoding = "utf-8"
+
+    text = r.text
+    if "<script" in text[:STATIC_SNIFF_CHARS].lower():
+        return None
+
+    # parsed from the raw bytes in the response's charset; lxml also
+    # decodes entities in <title>
+    try:
+        parser = lxml.html.HTMLParser(encoding=r.encoding)
+        doc: Any = r.content
+    except LookupError:  # charset unknown to lxml: parse requests' decoded text
+        parser, doc = None, text
+    try:
+        title = lxml.html.fromstring(doc, parser=parser).findtext(".//title")
+    except (etree.ParserError, ValueError):
+        title = None
+    return {
+        "Final_url": r.url,
+        "Title": title.strip() if title is not None else None,
+        "Source_code": text,
+    }
+
+
+def scrape_cache_path(
+    cache_dir: Path,
+    url: str,
+    quiet_ms: int,
+    max_settle_ms: int,
+    static_fetch: bool = False,
+    block_resources: bool = False,
+) -> Path:
+    """
+    Every option that changes the captured DOM is part of the key: the
+    settle wait, taking script-free pages from a plain HTTP fetch, and
+    blocking resources (blocked scripts never touch the DOM).
+    """
+    key_parts = (url, quiet_ms, max_settle_ms, int(static_fetch), int(block_resources))
+    key = hashlib.sha256("\x00".join(map(str, key_parts)).encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.json.gz"
+
+
+def load_cached_entry(path: Path, ttl_s: float) -> Optional[Dict[str, Any]]:
+    try:
+        if time.time() - path.stat().st_mtime >= ttl_s:
+            return None
+        with gzip.open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_entry(path: Path, entry: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wb") as f:
+        f.write(orjson.dumps(entry))
+    tmp.replace(path)
+
+
+def write_html_sidecar(entry: Dict[str, Any], html_dir: Path, index: int) -> Dict[str, Any]:
+    """
+    Move entry["Source_code"] into a gzip file under html_dir, leaving its
+    path and SHA-256 in the entry so the JSON no longer carries the page.
+    """
+    source = entry.get("Source_code")
+    if source is None:
+        return entry
+
+    data = source.encode("utf-8")
+    path = html_dir / f"{index:05d}.html.gz"
+    path.write_bytes(gzip.compress(data, compresslevel=6))
+
+    out = {k: v for k, v in entry.items() if k != "Source_code"}
+    out["Source_code_path"] = str(path)
+    out["Source_code_sha256"] = hashlib.sha256(data).hexdigest()
+    return out
+
+
 def build_arg_parser() -> argparse.ArgumentParser:
     """
     Configurations for webscraping
@@ -48,23 +322,70 @@ def build_arg_parser() -> argparse.ArgumentParser:
     ap.add_argument("--in_json", type=str, required=True, help="dataset_websites.json input")
     ap.add_argument("--out_json", type=str, required=True, help="output JSON path")
     ap.add_argument("--headless", action="store_true", help="Run Chrome headless")
+    ap.add_argument("--headless_mode", type=str, default="new", choices=["new", "old"],
+                    help="'old' starts faster but needs a Chrome that still ships legacy headless")
     ap.add_argument("--page_load_timeout_s", type=int, default=5, help="Selenium page load timeout")
     ap.add_argument("--dom_ready_timeout_s", type=int, default=5, help="Wait for document.readyState")
-    ap.add_argument("--extra_wait_s", type=float, default=5, help="Extra wait after DOM ready")
-    ap.add_argument("--sleep_between_sites_s", type=float, default=1.0, help="Rate limiting between sites")
+    ap.add_argument("--quiet_ms", type=int, default=500,
+                    help="After DOM ready, page counts as settled after this long without DOM mutations")
+    ap.add_argument("--max_settle_ms", type=int, default=5000,
+                    help="Upper bound on the settle wait (0 disables it)")
+    ap.add_argument("--sleep_between_sites_s", type=float, default=1.0,
+                    help="Rate limiting between pages of the same host")
+    ap.add_argument("--max_concurrency", type=int, default=5,
+                    help="Number of Chrome drivers scraping in parallel")
     ap.add_argument("--max_sites", type=int, default=0, help="If >0, scrape only first N sites")
     ap.add_argument("--screenshot_dir", type=str, default=None, help="Optional directory to save screenshots")
+    ap.add_argument("--screenshot_format", type=str, default="webp", choices=["webp", "jpeg", "png"],
+                    help="Screenshot encoding (webp/jpeg via CDP)")
+    ap.add_argument("--html_dir", type=str, default=None,
+                    help="If set, store each page as <html_dir>/NNNNN.html.gz instead of inline Source_code")
+    ap.add_argument("--block_resources", action="store_true",
+                    help="Skip images, fonts, media and analytics requests (pool drivers only)")
+    ap.add_argument("--static_fetch", action="store_true",
+                    help="Try a plain HTTP fetch first; use Chrome only for pages with scripts")
+    ap.add_argument("--cache_dir", type=str, default=None,
+                    help="Scrape cache directory (default: scrape_cache next to out_json)")
+    ap.add_argument("--cache_ttl_s", type=float, default=SCRAPE_CACHE_TTL_S,
+                    help="Reuse cached pages younger than this")
+    ap.add_argument("--no_cache", action="store_true",
+                    help="Always scrape; neither read nor write the cache")
     return ap
 
 
-def scrape_single_site(
+def scrape_single_site(driver, url: str, index: int, **scrape_kwargs: Any) -> Dict[str, Any]:
+    """
+    Scrape url in a fresh tab that is closed afterwards, so one site's
+    timers, workers and memory don't carry over into the next.
+    """
+    try:
+        home = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+    except WebDriverException:
+        return scrape_in_current_tab(driver, url, index, **scrape_kwargs)
+
+    try:
+        return scrape_in_current_tab(driver, url, index, **scrape_kwargs)
+    finally:
+        try:
+            driver.close()
+        except WebDriverException:
+            pass
+        driver.switch_to.window(home)
+
+
+def scrape_in_current_tab(
     driver,
     url: str,
     index: int,
     *,
     dom_ready_timeout_s: int,
-    extra_wait_s: float,
+    quiet_ms: int,
+    max_settle_ms: int,
     screenshot_dir: Optional[Path],
+    screenshot_format: str = "webp",
+    shot_writer: Optional[ThreadPoolExecutor] = None,
+    block_resources: bool = False,
 ) -> Dict[str, Any]:
     entry: Dict[str, Any] = {
         "Url": url,
@@ -76,6 +397,8 @@ def scrape_single_site(
 
     # Load the page
     try:
+        if block_resources:
+            block_urls(driver)
         driver.get(url)
     except WebDriverException as e:
         entry["Source_code"] = f"<!-- ERROR loading {url}: {e} -->"
@@ -86,36 +409,96 @@ def scrape_single_site(
         wait_for_dom_ready(driver, dom_ready_timeout_s)
     except TimeoutException:
         pass
-    if extra_wait_s > 0:
-        time.sleep(extra_wait_s)
+    page_info = wait_for_dom_settled(driver, quiet_ms, max_settle_ms)
 
-    # Extract website information
+    # Extract website information. Final_url is only set once the HTML was
+    # captured, so failed captures stay recognizable (and out of the cache).
     try:
-        entry["Final_url"] = driver.current_url
-        entry["Title"] = driver.title
-        entry["Source_code"] = driver.page_source
+        if page_info is not None:
+            final_url, title = page_info
+        else:
+            final_url, title = driver.current_url, driver.title
+        entry["Source_code"] = get_page_html(driver)
+        entry["Final_url"], entry["Title"] = final_url, title
     except WebDriverException as e:
         entry["Source_code"] = f"<!-- ERROR capturing page_source for {url}: {e} -->"
 
     # Save screenshot for later analysis
     if screenshot_dir is not None:
-        shot_path = screenshot_dir / f"{index:05d}.png"
         try:
-            driver.save_screenshot(str(shot_path))
+            shot_path, shot_write = save_screenshot(
+                driver, screenshot_dir / f"{index:05d}", screenshot_format, shot_writer
+            )
             entry["Screenshot_path"] = str(shot_path)
-        except WebDriverException:
-            pass
+            if shot_write is not None:
+                entry[SHOT_WRITE_KEY] = shot_write
+        except (WebDriverException, OSError, ValueError) as e:
+            print(f"[WARN] Screenshot failed for {url}: {e}")
 
     return entry
 
 
-def main() -> None:
-    parser = build_arg_parser()
-    args = parser.parse_args()
+def scrape_with_pool(
+    driver_q: "queue.Queue[webdriver.Chrome]",
+    host_locks: Dict[str, threading.Lock],
+    url: str,
+    index: int,
+    total: int,
+    *,
+    sleep_between_sites_s: float,
+    static_fetch_timeout_s: Optional[float] = None,
+    cache_path: Optional[Path] = None,
+    cache_ttl_s: float = SCRAPE_CACHE_TTL_S,
+    **scrape_kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Scrape one URL on a driver borrowed from driver_q. Pages of the same host
+    are loaded one at a time, sleep_between_sites_s apart; different hosts
+    run in parallel. With static_fetch_timeout_s set, script-free pages are
+    taken from a plain HTTP fetch and never touch a driver.
+    With cache_path set, a fresh cached page is returned without any request,
+    and successful scrapes are written back.
+    """
+    if cache_path is not None:
+        cached = load_cached_entry(cache_path, cache_ttl_s)
+        if cached is not None:
+            print(f"[{index}/{total}] Cached {url}")
+            # screenshots are named by run index, so a cached path may be stale
+            return {**cached, "Url": url, "Screenshot_path": None}
 
+    with host_locks[urlparse(url).netloc]:
+        static = None
+        if static_fetch_timeout_s is not None:
+            static = try_static_fetch(url, static_fetch_timeout_s)
+
+        if static is not None:
+            print(f"[{index}/{total}] Fetched {url} (static)")
+            entry = {"Url": url, **static, "Screenshot_path": None}
+        else:
+            driver = driver_q.get()
+            try:
+                print(f"[{index}/{total}] Loading {url}")
+                entry = scrape_single_site(driver, url, index, **scrape_kwargs)
+            finally:
+                driver_q.put(driver)
+        if sleep_between_sites_s > 0:
+            time.sleep(sleep_between_sites_s)
+
+    # Final_url is only set once the page was captured; errors are not cached
+    if cache_path is not None and entry.get("Final_url"):
+        save_cached_entry(cache_path, {k: v for k, v in entry.items() if k != SHOT_WRITE_KEY})
+    return entry
+
+
+def run(args: argparse.Namespace, driver: Optional[webdriver.Chrome] = None) -> int:
+    """
+    Scrape the sites described by args and return the number of entries
+    written. A live driver passed in (e.g. shared by run_pipeline with later
+    stages) joins the pool and is left running; drivers built here are quit
+    before returning.
+    """
     # this is where the source code will be stored
-    with open(args.in_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(Path(args.in_json).read_bytes())
 
     # extract target URLs
     urls: List[str] = [
@@ -136,35 +519,117 @@ def main() -> None:
         screenshot_dir = Path(args.screenshot_dir).expanduser().resolve()
         screenshot_dir.mkdir(parents=True, exist_ok=True)
 
-    # establishing selenium driver
-    driver = build_driver(headless=args.headless)
-    driver.set_page_load_timeout(args.page_load_timeout_s)
+    # this is where the page HTML goes when kept out of the JSON
+    html_dir: Optional[Path] = None
+    if args.html_dir:
+        html_dir = Path(args.html_dir).expanduser().resolve()
+        html_dir.mkdir(parents=True, exist_ok=True)
+
+    # scraped pages are cached across runs unless --no_cache
+    cache_dir: Optional[Path] = None
+    if not args.no_cache:
+        cache_dir = (
+            Path(args.cache_dir).expanduser().resolve() if args.cache_dir
+            else out_path.parent / "scrape_cache"
+        )
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # per-host politeness: one page at a time per host
+    host_locks = {urlparse(u).netloc: threading.Lock() for u in urls}
 
-    # where the source code will be stored
-    out_list: List[Dict[str, Any]] = []
+    # pool of warm selenium drivers, one per worker thread (never more than
+    # the number of hosts, since each host is scraped serially)
+    n_drivers = max(1, min(args.max_concurrency, len(host_locks)))
+    driver_q: "queue.Queue[webdriver.Chrome]" = queue.Queue()
+    owned_drivers: List[webdriver.Chrome] = []
+
+    # screenshot files are written off the scraping threads
+    shot_writer = ThreadPoolExecutor(max_workers=2) if screenshot_dir is not None else None
+
+    # entries are written in input order as soon as they are ready, so only
+    # pages scraped ahead of the next one to write are held in memory
+    count = 0
+    script_timeout_s = args.max_settle_ms / 1000 + 5
+    # written next to out_json and moved over it only once complete, so a
+    # failed run leaves the previous out_json intact
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
     try:
-        for i, url in enumerate(urls, start=1):
-            print(f"[{i}/{len(urls)}] Loading {url}")
-
-            entry = scrape_single_site(
-                driver,
-                url,
-                i,
-                dom_ready_timeout_s=args.dom_ready_timeout_s,
-                extra_wait_s=args.extra_wait_s,
-                screenshot_dir=screenshot_dir,
+        if driver is not None:
+            driver.set_page_load_timeout(args.page_load_timeout_s)
+            driver.set_script_timeout(script_timeout_s)
+            driver_q.put(driver)
+        while driver_q.qsize() < n_drivers:
+            d = build_driver(
+                headless=args.headless,
+                block_resources=args.block_resources,
+                headless_mode=args.headless_mode,
             )
+            d.set_page_load_timeout(args.page_load_timeout_s)
+            d.set_script_timeout(script_timeout_s)
+            owned_drivers.append(d)
+            driver_q.put(d)
+
+        with ThreadPoolExecutor(max_workers=n_drivers) as executor, \
+                tmp_path.open("wb") as out:
+            futures: Deque[Future] = deque([
+                executor.submit(
+                    scrape_with_pool,
+                    driver_q,
+                    host_locks,
+                    url,
+                    i,
+                    len(urls),
+                    sleep_between_sites_s=args.sleep_between_sites_s,
+                    static_fetch_timeout_s=(
+                        args.page_load_timeout_s if args.static_fetch else None
+                    ),
+                    cache_path=(
+                        scrape_cache_path(
+                            cache_dir, url, args.quiet_ms, args.max_settle_ms,
+                            args.static_fetch, args.block_resources,
+                        )
+                        if cache_dir is not None else None
+                    ),
+                    cache_ttl_s=args.cache_ttl_s,
+                    dom_ready_timeout_s=args.dom_ready_timeout_s,
+                    quiet_ms=args.quiet_ms,
+                    max_settle_ms=args.max_settle_ms,
+                    screenshot_dir=screenshot_dir,
+                    screenshot_format=args.screenshot_format,
+                    shot_writer=shot_writer,
+                    block_resources=args.block_resources,
+                )
+                for i, url in enumerate(urls, start=1)
+            ])
 
-            out_list.append(entry)
-            time.sleep(args.sleep_between_sites_s)
+            out.write(b'{"source_code_list": [\n')
+            for i in range(1, len(urls) + 1):
+                entry = futures.popleft().result()
+                finish_screenshot(entry)
+                if html_dir is not None:
+                    entry = write_html_sidecar(entry, html_dir, i)
+                if count:
+                    out.write(b",\n")
+                out.write(orjson.dumps(entry, option=orjson.OPT_INDENT_2))
+                count += 1
+            out.write(b"\n]}\n")
+        tmp_path.replace(out_path)
     finally:
-        driver.quit()
-    out_obj = {"source_code_list": out_list}
-    out_path.write_text(json.dumps(out_obj, indent=2), encoding="utf-8")
+        tmp_path.unlink(missing_ok=True)
+        if shot_writer is not None:
+            shot_writer.shutdown(wait=True)
+        for d in owned_drivers:
+            d.quit()
 
-    print(f"Website sourcecode is in {len(out_list)} entries -> {out_path}")
+    print(f"Website sourcecode is in {count} entries -> {out_path}")
+    return count
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    run(args)
 
 
 if __name__ == "__main__":
     main()
-
@@ -7,15 +7,45 @@ add injection scripts based on a human reviwers feedback
 from __future__ import annotations
 
 import argparse
-import json
+import base64
+import gzip
+import hashlib
+import itertools
+import queue
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Any, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
+import orjson
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import WebDriverException
 
+# Quality of lossy (webp / jpeg) screenshots
+SCREENSHOT_QUALITY = 75
+
+# With --reuse_page, items for an already loaded URL reuse the page: the DOM
+# is snapshotted right after the load and restored before each further
+# injection (innerHTML does not re-run the page's scripts, unlike
+# document.write). Timers, listeners and globals left by the previous
+# injection survive the restore, so this is opt-in; by default every item
+# reloads its page.
+SNAPSHOT_DOM_JS = """
+const el = document.documentElement;
+return [location.href, Array.from(el.attributes, a => [a.name, a.value]), el.innerHTML];
+"""
+RESTORE_DOM_JS = """
+const [href, attrs, html] = arguments;
+if (location.href !== href) return false;
+const el = document.documentElement;
+for (const a of Array.from(el.attributes)) el.removeAttribute(a.name);
+for (const [name, value] of attrs) el.setAttribute(name, value);
+el.innerHTML = html;
+window.scrollTo(0, 0);
+return true;
+"""
+
 
 def build_driver(headless: bool) -> webdriver.Chrome:
     opts = Options()
@@ -37,9 +67,27 @@ def build_arg_parser() -> argparse.ArgumentParser:
     ap.add_argument("--page_load_timeout_s", type=int, default=30)
     ap.add_argument("--post_inject_wait_s", type=float, default=1.0)
     ap.add_argument("--screenshot_dir", type=str, default=None)
+    ap.add_argument("--screenshot_format", type=str, default="webp", choices=["webp", "jpeg", "png"],
+                    help="Screenshot encoding (webp/jpeg via CDP)")
+    ap.add_argument("--html_dir", type=str, default=None,
+                    help="If set, store Injected_html as gzip files here instead of inline")
+    ap.add_argument("--restart", action="store_true",
+                    help="Discard the decision log of an earlier session instead of resuming")
+    ap.add_argument("--prefetch", type=int, default=1,
+                    help="Items loaded + injected ahead of the one under review (one extra browser each)")
+    ap.add_argument("--reuse_page", action="store_true",
+                    help="Restore the DOM of an already loaded URL instead of reloading it "
+                         "(faster, but earlier injections' timers/listeners/globals remain)")
     return ap
 
 
+def write_html_gz(path: Path, html: str) -> str:
+    """Write html gzip-compressed to path; returns its SHA-256."""
+    data = html.encode("utf-8")
+    path.write_bytes(gzip.compress(data, compresslevel=6))
+    return hashlib.sha256(data).hexdigest()
+
+
 def resolve_paths(args: argparse.Namespace) -> Tuple[Path, Path, Optional[Path]]:
     inj_path = Path(args.injection_json).expanduser().resolve()
     out_json = Path(args.out_json).expanduser().resolve()
@@ -53,25 +101,51 @@ def resolve_paths(args: argparse.Namespace) -> Tuple[Path, Path, Optional[Path]]
     return inj_path, out_json, screenshot_dir
 
 
+def save_screenshot(driver: webdriver.Chrome, shot_path: Path, fmt: str) -> Path:
+    """
+    Save a viewport screenshot as shot_path with fmt's suffix. png goes
+    through WebDriver; webp/jpeg are encoded by Chrome via CDP, which is
+    several times smaller and skips the lossless encode.
+    """
+    shot_path = shot_path.with_suffix(f".{fmt}")
+    if fmt == "png":
+        driver.save_screenshot(str(shot_path))
+    else:
+        shot = driver.execute_cdp_cmd(
+            "Page.captureScreenshot", {"format": fmt, "quality": SCREENSHOT_QUALITY}
+        )
+        shot_path.write_bytes(base64.b64decode(shot["data"]))
+    return shot_path
+
+
 def take_screenshot(
     driver: webdriver.Chrome,
     screenshot_dir: Optional[Path],
     idx: int,
     rule_id: str,
+    fmt: str = "webp",
+    log: Callable[[str], None] = print,
 ) -> Optional[Path]:
     if screenshot_dir is None:
         return None
 
     safe_name = f"{idx:05d}_{rule_id}".replace("/", "_")
-    shot_path = screenshot_dir / f"{safe_name}.png"
     try:
-        driver.save_screenshot(str(shot_path))
-        print(f"[OK] Screenshot -> {shot_path}")
+        shot_path = save_screenshot(driver, screenshot_dir / safe_name, fmt)
+        log(f"[OK] Screenshot -> {shot_path}")
         return shot_path
     except WebDriverException:
         return None
     
 
+def bring_to_front(driver: webdriver.Chrome) -> None:
+    """Activate the driver's window so the reviewer sees the item being asked about."""
+    try:
+        driver.switch_to.window(driver.current_window_handle)
+    except WebDriverException:
+        pass
+
+
 def prompt_human_decision() -> str:
     """
     Returns one of: "y", "n", "q"
@@ -82,93 +156,397 @@ def prompt_human_decision() -> str:
             return ans
     
 
-def run_human_review_loop(
-    driver: webdriver.Chrome,
+class PreparedItem(NamedTuple):
+    """A review item whose page is loaded and injected on `driver`."""
+    idx: int
+    item: Dict[str, Any]
+    url: str
+    rule_id: str
+    js: str
+    driver: webdriver.Chrome
+    injected_html: str
+    shot_path: Optional[Path]
+    ready_ahead: int = 0  # items already prepared behind this one
+    logs: Tuple[str, ...] = ()  # messages from preparing it in the background
+
+
+def iter_review_items(
     inj_list: List[Dict[str, Any]],
-    *,
-    post_inject_wait_s: float,
-    screenshot_dir: Optional[Path],
-) -> List[Dict[str, Any]]:
+    reviewed: Set[Tuple[str, str, str]] = frozenset(),
+) -> Iterator[Tuple[int, Dict[str, Any], str, str, str]]:
     """
-    Runs the Selenium + injection + screenshot + human prompt loop.
-    Returns the accepted_records list.
+    Yield the items still to review, grouped by URL (in order of first
+    appearance) so consecutive items can share one page load.
     """
-    accepted_records: List[Dict[str, Any]] = []
-
+    by_url: Dict[str, List[Tuple[int, Dict[str, Any], str, str, str]]] = {}
     for idx, item in enumerate(inj_list):
         url = item.get("url")
         rule_id = (item.get("WCAG_technique") or {}).get("technique_id")
         js = (item.get("injection") or {}).get("injection_js")
 
-        if not (url and rule_id and js):
-            continue
+        if url and rule_id and js and (url, rule_id, injection_sha256(js)) not in reviewed:
+            by_url.setdefault(url, []).append((idx, item, url, rule_id, js))
+
+    for group in by_url.values():
+        yield from group
+
+
+# ------------------------- Decision log -----------------------------------
+# Every decision is appended to <out_json>.jsonl as it is made, so an
+# interrupted session loses nothing and a re-run resumes where it stopped.
+# Accepted lines are the final records; rejected lines carry "Rejected".
+# Decisions are keyed on (Url, Rule_id, SHA-256 of the injection JS), so a
+# regenerated injection for the same page and rule is reviewed again.
+
+def injection_sha256(js: str) -> str:
+    return hashlib.sha256(js.encode("utf-8")).hexdigest()
+
+
+def decision_key(record: Dict[str, Any]) -> Tuple[str, str, str]:
+    js_sha = record.get("Injection_sha256") or injection_sha256(record.get("Injection_js") or "")
+    return record.get("Url"), record.get("Rule_id"), js_sha
+
+
+def load_decision_log(log_path: Path) -> List[Dict[str, Any]]:
+    if not log_path.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    with log_path.open("rb") as f:
+        for line in f:
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue  # torn last line from a hard kill
+    return records
 
-        print(f"\n[{idx+1}/{len(inj_list)}] URL={url} RULE={rule_id}")
 
+def append_decision(log: BinaryIO, record: Dict[str, Any]) -> None:
+    log.write(orjson.dumps(record) + b"\n")
+    log.flush()
+
+
+def prepare_item(
+    driver: webdriver.Chrome,
+    idx: int,
+    item: Dict[str, Any],
+    url: str,
+    rule_id: str,
+    js: str,
+    *,
+    post_inject_wait_s: float,
+    screenshot_dir: Optional[Path],
+    screenshot_format: str = "webp",
+    page_snapshots: Optional[Dict[webdriver.Chrome, Tuple[str, List[Any]]]] = None,
+    log: Callable[[str], None] = print,
+) -> Optional[PreparedItem]:
+    """
+    Load url, run the injection, let it settle and capture HTML + screenshot.
+    With page_snapshots (driver -> (url, DOM snapshot)), a driver still on
+    url gets its DOM restored instead of reloading the page.
+    Progress and warnings go to log (print unless run in the background).
+    """
+    snapshot = page_snapshots.get(driver) if page_snapshots is not None else None
+    reused = False
+    if snapshot is not None and snapshot[0] == url:
+        try:
+            reused = bool(driver.execute_script(RESTORE_DOM_JS, *snapshot[1]))
+        except WebDriverException:
+            reused = False
+
+    if not reused:
+        if page_snapshots is not None:
+            page_snapshots.pop(driver, None)
         try:
             driver.get(url)
         except WebDriverException as e:
-            print(f"[WARN] Failed to load {url}: {e}")
-            continue
+            log(f"[WARN] Failed to load {url}: {e}")
+            return None
+        if page_snapshots is not None:
+            try:
+                page_snapshots[driver] = (url, driver.execute_script(SNAPSHOT_DOM_JS))
+            except WebDriverException:
+                pass
+
+    try:
+        driver.execute_script(js)
+    except WebDriverException as e:
+        log(f"[WARN] Injection failed for {url} ({rule_id}): {e}")
+        return None
+
+    time.sleep(post_inject_wait_s)
+    injected_html = driver.page_source
+
+    # Take Screenshot
+    shot_path = take_screenshot(driver, screenshot_dir, idx, rule_id, screenshot_format, log)
 
+    return PreparedItem(idx, item, url, rule_id, js, driver, injected_html, shot_path)
+
+
+def iter_prepared_prefetch(
+    drivers: List[webdriver.Chrome],
+    inj_list: List[Dict[str, Any]],
+    reviewed: Set[Tuple[str, str, str]] = frozenset(),
+    **prepare_kwargs: Any,
+) -> Iterator[PreparedItem]:
+    """
+    Prepare items on background threads (one per driver) so the reviewer
+    rarely waits on a page load. Each URL group stays on one driver, so its
+    later items reuse the loaded page (DOM reset, no reload) while the other
+    drivers prepare the next groups. Each yielded item keeps its driver (and
+    browser window) until the caller asks for the next one.
+    Background threads never print (the reviewer may be typing): their
+    messages travel with the next prepared item in .logs, and an unexpected
+    error there is re-raised here.
+    """
+    groups_q: "queue.Queue[List[Tuple[int, Dict[str, Any], str, str, str]]]" = queue.Queue()
+    for _, group in itertools.groupby(iter_review_items(inj_list, reviewed), key=lambda a: a[2]):
+        groups_q.put(list(group))
+
+    # One token per driver, held while the driver's item is prepared or reviewed
+    free: Dict[webdriver.Chrome, "queue.Queue[bool]"] = {d: queue.Queue() for d in drivers}
+    ready_q: "queue.Queue[Optional[PreparedItem]]" = queue.Queue()
+    stop = threading.Event()
+    leftover_logs: List[str] = []
+    errors: List[BaseException] = []
+
+    def producer(d: webdriver.Chrome) -> None:
+        logs: List[str] = []  # messages not yet attached to a prepared item
         try:
-            driver.execute_script(js)
-        except WebDriverException as e:
-            print(f"[WARN] Injection failed for {url} ({rule_id}): {e}")
-            continue
-
-        time.sleep(post_inject_wait_s)
-        injected_html = driver.page_source
-
-        # Take Screenshot
-        shot_path = take_screenshot(driver, screenshot_dir, idx, rule_id)
-
-        # Human-in-the-loop decision
-        ans = prompt_human_decision()
-
-        if ans == "y":
-            accepted_records.append({
-                "Url": url,
-                "Rule_id": rule_id,
-                "Rule_filename": item.get("Rule_filename"),
-                "Injection_js": js,
-                "Injected_html": injected_html,
-                "Screenshot_path": str(shot_path) if shot_path else None,
-                "Timestamp_unix": time.time(),
-            })
-            print(f"[OK] Accepted ({len(accepted_records)} total)")
-        else:
-            print("[SKIP] Not included.")
+            while not stop.is_set():
+                try:
+                    group = groups_q.get_nowait()
+                except queue.Empty:
+                    break
+                for idx, item, url, rule_id, js in group:
+                    free[d].get()
+                    if stop.is_set():
+                        return
+                    try:
+                        prepared = prepare_item(
+                            d, idx, item, url, rule_id, js, log=logs.append, **prepare_kwargs
+                        )
+                    except WebDriverException as e:
+                        logs.append(f"[WARN] Failed to prepare {url}: {e}")
+                        prepared = None
+                    if prepared is None:
+                        free[d].put(True)
+                    else:
+                        ready_q.put(prepared._replace(logs=tuple(logs)))
+                        logs.clear()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            leftover_logs.extend(logs)
+            ready_q.put(None)
+
+    workers = [threading.Thread(target=producer, args=(d,), daemon=True) for d in drivers]
+    for d, w in zip(drivers, workers):
+        free[d].put(True)
+        w.start()
+
+    running = len(workers)
+    try:
+        while running:
+            prepared = ready_q.get()
+            if prepared is None:
+                running -= 1
+                continue
+            try:
+                yield prepared._replace(ready_ahead=ready_q.qsize())
+            finally:
+                free[prepared.driver].put(True)
+        for line in leftover_logs:
+            print(line)
+        if errors:
+            raise errors[0]
+    finally:
+        if running:
+            # Unblock the producers and wait for them to finish their current page
+            stop.set()
+            for q in free.values():
+                q.put(True)
+            while running:
+                if ready_q.get() is None:
+                    running -= 1
+        for w in workers:
+            w.join()
+
+
+def run_human_review_loop(
+    driver: webdriver.Chrome,
+    inj_list: List[Dict[str, Any]],
+    *,
+    post_inject_wait_s: float,
+    screenshot_dir: Optional[Path],
+    screenshot_format: str = "webp",
+    html_dir: Optional[Path] = None,
+    prefetch_drivers: Sequence[webdriver.Chrome] = (),
+    decision_log: Optional[BinaryIO] = None,
+    reviewed: Set[Tuple[str, str, str]] = frozenset(),
+    reuse_page: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Runs the Selenium + injection + screenshot + human prompt loop.
+    With prefetch_drivers, upcoming items are loaded on those drivers while
+    the human is deciding on the current one. Items whose (url, rule_id) is
+    in reviewed (see decision_key) are skipped; each new decision is appended to decision_log.
+    Returns the accepted_records list (this session only).
+    """
+    accepted_records: List[Dict[str, Any]] = []
+    prepare_kwargs = dict(
+        post_inject_wait_s=post_inject_wait_s,
+        screenshot_dir=screenshot_dir,
+        screenshot_format=screenshot_format,
+        page_snapshots={} if reuse_page else None,
+    )
+
+    if prefetch_drivers:
+        prepared_items: Iterator[Optional[PreparedItem]] = iter_prepared_prefetch(
+            [driver, *prefetch_drivers], inj_list, reviewed, **prepare_kwargs
+        )
+    else:
+        prepared_items = (
+            prepare_item(driver, *args, **prepare_kwargs)
+            for args in iter_review_items(inj_list, reviewed)
+        )
+
+    try:
+        for prepared in prepared_items:
+            if prepared is None:
+                continue
+            idx, item, url, rule_id, js, item_driver, injected_html, shot_path, ready_ahead, _ = prepared
+
+            print(f"\n[{idx+1}/{len(inj_list)}] URL={url} RULE={rule_id}")
+            for line in prepared.logs:
+                print(line)
+            if prefetch_drivers:
+                print(f"    Queue: {ready_ahead} ready, up to {len(prefetch_drivers)} prepared ahead")
+                bring_to_front(item_driver)
+
+            # Human-in-the-loop decision
+            ans = prompt_human_decision()
+
+            if ans == "q":
+                # Nothing is logged, so this item is asked again on resume
+                print("[QUIT] Review stopped; decisions so far are saved.")
+                break
+
+            if ans == "y":
+                record: Dict[str, Any] = {
+                    "Url": url,
+                    "Rule_id": rule_id,
+                    "Rule_filename": item.get("Rule_filename"),
+                    "Injection_js": js,
+                    "Injected_html": injected_html,
+                    "Screenshot_path": str(shot_path) if shot_path else None,
+                    "Timestamp_unix": time.time(),
+                }
+                if html_dir is not None:
+                    html_path = html_dir / f"{idx:05d}_{rule_id}.html.gz".replace("/", "_")
+                    del record["Injected_html"]
+                    record["Injected_html_path"] = str(html_path)
+                    record["Injected_html_sha256"] = write_html_gz(html_path, injected_html)
+                accepted_records.append(record)
+                if decision_log is not None:
+                    append_decision(decision_log, record)
+                print(f"[OK] Accepted ({len(accepted_records)} total)")
+            else:  # "n"
+                if decision_log is not None:
+                    append_decision(decision_log, {
+                        "Url": url,
+                        "Rule_id": rule_id,
+                        "Injection_sha256": injection_sha256(js),
+                        "Rejected": True,
+                    })
+                print("[SKIP] Not included.")
+    finally:
+        # stops the prefetch thread promptly on quit / Ctrl-C
+        prepared_items.close()
     return accepted_records
 
 
-def main() -> None:
-    args = build_arg_parser().parse_args()
+def run(args: argparse.Namespace, driver: Optional[webdriver.Chrome] = None) -> List[Dict[str, Any]]:
+    """
+    Review the injections described by args. A live driver passed in (e.g.
+    shared by run_pipeline with earlier stages) is reused and left running;
+    otherwise one is built here and quit at the end.
+    Returns every accepted record for the current injections, including
+    those from resumed sessions.
+    """
     inj_path, out_json, screenshot_dir = resolve_paths(args)
 
-    with open(inj_path, "r", encoding="utf-8") as f:
-        inj_obj = json.load(f)
+    html_dir: Optional[Path] = None
+    if args.html_dir:
+        html_dir = Path(args.html_dir).expanduser().resolve()
+        html_dir.mkdir(parents=True, exist_ok=True)
+
+    inj_obj = orjson.loads(inj_path.read_bytes())
     inj_list: List[Dict[str, Any]] = inj_obj.get("injections", [])
 
-    driver = build_driver(headless=args.headless)
+    # Resume from the decision log of an earlier, unfinished session
+    log_path = out_json.with_suffix(".jsonl")
+    if args.restart:
+        log_path.unlink(missing_ok=True)
+    # Only decisions on the injections in this file count; records for
+    # injections since regenerated or dropped are left out
+    current = {
+        (item.get("url"), (item.get("WCAG_technique") or {}).get("technique_id"),
+         injection_sha256((item.get("injection") or {}).get("injection_js") or ""))
+        for item in inj_list
+    }
+    reviewed = {decision_key(r) for r in load_decision_log(log_path)} & current
+    if reviewed:
+        print(f"[RESUME] {len(reviewed)} decisions already in {log_path}")
+
+    owns_driver = driver is None
+    if driver is None:
+        driver = build_driver(headless=args.headless)
     driver.set_page_load_timeout(args.page_load_timeout_s)
 
     # print("INJ LIST SIZE: ", len(inj_list))
 
+    prefetch_drivers: List[webdriver.Chrome] = []
     try:
-        accepted_records = run_human_review_loop(
-            driver,
-            inj_list,
-            post_inject_wait_s=args.post_inject_wait_s,
-            screenshot_dir=screenshot_dir,
-        )
+        for _ in range(max(0, args.prefetch)):
+            d = build_driver(headless=args.headless)
+            d.set_page_load_timeout(args.page_load_timeout_s)
+            prefetch_drivers.append(d)
+
+        with log_path.open("ab") as decision_log:
+            run_human_review_loop(
+                driver,
+                inj_list,
+                post_inject_wait_s=args.post_inject_wait_s,
+                screenshot_dir=screenshot_dir,
+                screenshot_format=args.screenshot_format,
+                html_dir=html_dir,
+                prefetch_drivers=prefetch_drivers,
+                decision_log=decision_log,
+                reviewed=reviewed,
+                reuse_page=args.reuse_page,
+            )
     finally:
-        driver.quit()
+        for d in prefetch_drivers:
+            d.quit()
+        if owns_driver:
+            driver.quit()
+
+        # Rebuild the final JSON from the log, also after Ctrl-C
+        accepted_records = [
+            r for r in load_decision_log(log_path)
+            if not r.get("Rejected") and decision_key(r) in current
+        ]
+        out_json.write_bytes(
+            orjson.dumps({"final_dataset": accepted_records}, option=orjson.OPT_INDENT_2)
+        )
+        print(f"\nFinal dataset written to -> {out_json} (count={len(accepted_records)})")
+
+    return accepted_records
 
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump({"final_dataset": accepted_records}, f, indent=2)
 
-    print(f"\nFinal dataset written to -> {out_json} (count={len(accepted_records)})")
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    run(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+"""
+Embedding backends of MainPipeline/rag_tool.py must put queries in the same
+vector space as the committed wcag_chroma index (built with the PyTorch
+sentence-transformers model).
+
+Needs the optional ONNX stack (llama-index-embeddings-huggingface-optimum).
+Small random models are built locally; the all-MiniLM-L6-v2 check is
+skipped when the model cannot be downloaded.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "MainPipeline"))
+
+pytest.importorskip("llama_index.embeddings.huggingface_optimum")
+rag_tool = pytest.importorskip("rag_tool")
+
+MINILM = "sentence-transformers/all-MiniLM-L6-v2"
+TEXTS = [
+    "Images must have a text alternative.",
+    "F65: Failure of Success Criterion 1.1.1 due to omitting the alt attribute",
+]
+
+
+def build_tiny_model(path: Path, pooling_mode: str) -> str:
+    """A randomly initialized BERT saved as a sentence-transformers model."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += sorted({w for t in TEXTS for w in t.lower().replace(":", " ").split()})
+    hf_dir = path / "hf"
+    hf_dir.mkdir(parents=True)
+    (hf_dir / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(hf_dir / "vocab.txt")).save_pretrained(hf_dir)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=128,
+    )
+    BertModel(config).save_pretrained(hf_dir)
+
+    transformer = models.Transformer(str(hf_dir), max_seq_length=128)
+    pool = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode=pooling_mode)
+    st_dir = path / "st"
+    SentenceTransformer(modules=[transformer, pool, models.Normalize()]).save(str(st_dir))
+    return str(st_dir)
+
+
+def assert_backends_match(model_name: str, onnx_dir: Path) -> None:
+    torch_model = rag_tool.make_embed_model("huggingface", model_name, device="cpu")
+    onnx_model = rag_tool.make_embed_model(
+        "optimum", model_name, onnx_dir=str(onnx_dir), device="cpu"
+    )
+    for text in TEXTS:
+        a = np.asarray(torch_model.get_query_embedding(text))
+        b = np.asarray(onnx_model.get_query_embedding(text))
+        assert a.shape == b.shape
+        cosine = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+        assert cosine > 0.999
+        np.testing.assert_allclose(a, b, atol=1e-3)
+
+
+@pytest.mark.parametrize("pooling_mode", ["mean", "cls"])
+def test_optimum_matches_huggingface_tiny_model(tmp_path, pooling_mode):
+    model_dir = build_tiny_model(tmp_path / "model", pooling_mode)
+    assert rag_tool.sentence_transformers_pooling(model_dir) == pooling_mode
+    assert_backends_match(model_dir, tmp_path / "onnx")
+
+
+def test_optimum_matches_huggingface_minilm(tmp_path):
+    try:
+        assert rag_tool.sentence_transformers_pooling(MINILM) == "mean"
+    except OSError as e:  # model download unavailable
+        pytest.skip(f"cannot load {MINILM}: {e}")
+    assert_backends_match(MINILM, tmp_path / "onnx")
+
+
+def test_optimum_rejects_unsupported_pooling(tmp_path):
+    model_dir = build_tiny_model(tmp_path / "model", "max")
+    with pytest.raises(ValueError):
+        rag_tool.make_embed_model("optimum", model_dir, onnx_dir=str(tmp_path / "onnx"))